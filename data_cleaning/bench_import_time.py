@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules that scoring / ingestion jobs must not pay for at import time
+HEAVY_MODULES = ['matplotlib', 'mpl_toolkits', 'seaborn', 'sklearn', 'scipy', 'pandas', 'pyarrow', 'joblib', 'tqdm']
+LIGHT_MODULES = ['shot_geometry', 'xg_scorer', 'data_funtion']
+# Allowed import cost on top of a bare `import numpy`, in milliseconds
+BUDGET_MS = 60
+REPEATS = 5
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(__import__('json').dumps({{'ms': elapsed * 1000, 'modules': sorted(sys.modules)}}))
+"""
+
+def measure_import(module, cwd):
+    """
+    在全新的解释器中测量导入时间, 返回 (最短耗时ms, 导入后已加载的模块)
+    """
+    best, modules = float('inf'), []
+    for _ in range(REPEATS):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module)],
+            cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        best = min(best, result['ms'])
+        modules = result['modules']
+    return best, modules
+
+def main():
+    """
+    导入时间基准: 轻量模块不得加载重依赖, 且相对numpy的额外耗时不得超过预算
+    """
+    cwd = Path(__file__).resolve().parent
+    baseline, _ = measure_import('numpy', cwd)
+    print(f"numpy: {baseline:.1f} ms")
+    
+    failures = []
+    for module in LIGHT_MODULES:
+        elapsed, modules = measure_import(module, cwd)
+        heavy = sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+        print(f"{module}: {elapsed:.1f} ms (+{elapsed - baseline:.1f} ms over numpy)")
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        if elapsed - baseline > BUDGET_MS:
+            failures.append(f"{module} import takes {elapsed - baseline:.1f} ms over numpy (budget {BUDGET_MS} ms)")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
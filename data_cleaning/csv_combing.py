@@ -1,10 +1,206 @@
+import csv
+import hashlib
 import pandas as pd
+from pathlib import Path
 
-file_path_pt = '/Users/yifengluo/Downloads/xG-project-code-main/xG-project-code/data_cleaning/web-scraping/Argentina_France_pt.csv'
-df_pt = pd.read_csv(file_path_pt)
-file_path_st = '/Users/yifengluo/Downloads/xG-project-code-main/xG-project-code/data_cleaning/web-scraping/shots_ap.csv'
-df_st = pd.read_csv(file_path_st)
-combined_df = pd.concat([df_pt, df_st], ignore_index=True)
-combined_df = combined_df.iloc[1:]
+SCRAPED_DIR = Path(__file__).resolve().parent / 'web-scraping'
+OUTPUT_DIR = Path(__file__).resolve().parent / 'scraped_tables'
+EXCLUDED_DIRS = ('wrong_data',)
 
-combined_df = combined_df.dropna()
\ No newline at end of file
+# Column -> dtype for each kind of scraped table
+SCHEMAS = {
+    'shots': {
+        'Minute': 'Int16', 'Player': 'string', 'Squad': 'string', 'xG': 'float32', 'PSxG': 'float32',
+        'Outcome': 'category', 'Distance': 'Int16', 'Body Part': 'category', 'Notes': 'string',
+        'SCA 1 Player': 'string', 'SCA 1 Event': 'category', 'SCA 2 Player': 'string', 'SCA 2 Event': 'category'
+    },
+    'summary': {
+        'Player': 'string', '#': 'Int16', 'Nation': 'string', 'Pos': 'string', 'Age': 'string', 'Club': 'string',
+        'Min': 'Int16', 'Gls': 'Int16', 'Ast': 'Int16', 'PK': 'Int16', 'PKatt': 'Int16', 'Sh': 'Int16', 'SoT': 'Int16',
+        'CrdY': 'Int16', 'CrdR': 'Int16', 'Touches': 'Int16', 'Tkl': 'Int16', 'Int': 'Int16', 'Blocks': 'Int16',
+        'xG': 'float32', 'npxG': 'float32', 'xAG': 'float32', 'SCA': 'Int16', 'GCA': 'Int16', 'Cmp': 'Int16',
+        'Passes Att': 'Int16', 'Cmp%': 'float32', 'PrgP': 'Int16', 'Carries': 'Int16', 'PrgC': 'Int16',
+        'Take-Ons Att': 'Int16', 'Succ': 'Int16'
+    },
+    'passing_types': {
+        'Player': 'string', '#': 'Int16', 'Nation': 'string', 'Pos': 'string', 'Age': 'string', 'Club': 'string',
+        'Min': 'Int16', 'Att': 'Int16', 'Live': 'Int16', 'Dead': 'Int16', 'FK': 'Int16', 'TB': 'Int16', 'Sw': 'Int16',
+        'Crs': 'Int16', 'TI': 'Int16', 'CK': 'Int16', 'In': 'Int16', 'Out': 'Int16', 'Str': 'Int16', 'Cmp': 'Int16',
+        'Off': 'Int16', 'Blocks': 'Int16'
+    }
+}
+# Header cells that only occur in one kind of table
+SIGNATURES = {
+    'shots': {'Minute', 'Squad', 'Outcome'},
+    'summary': {'Player', 'Min', 'Gls', 'xG'},
+    'passing_types': {'Player', 'Min', 'Live', 'Dead'}
+}
+# Columns that identify one row within a match; rows sharing these and the match key are the same record
+ROW_KEYS = {
+    'shots': ['Minute', 'Player', 'xG', 'Outcome', 'Distance'],
+    'summary': ['Player', 'Age', 'Min'],
+    'passing_types': ['Player', 'Age', 'Min']
+}
+# Repeated header names, in order of appearance, as named by fbref_tables
+DUPLICATE_NAMES = {
+    'shots': {'Player': ['Player', 'SCA 1 Player', 'SCA 2 Player'], 'Event': ['SCA 1 Event', 'SCA 2 Event']},
+    'summary': {'Att': ['Passes Att', 'Take-Ons Att']}
+}
+
+def _table_kind(header):
+    cells = set(header)
+    for kind, signature in SIGNATURES.items():
+        if signature <= cells:
+            return kind
+    return None
+
+def _canonical_header(kind, header):
+    names, seen = [], {}
+    for name in header:
+        index = seen.get(name, 0)
+        seen[name] = index + 1
+        renames = DUPLICATE_NAMES.get(kind, {}).get(name)
+        names.append(renames[index] if renames and index < len(renames) else name if index == 0 else f"{name}_{index + 1}")
+    return names
+
+def _read_raw(path):
+    """
+    读取一个CSV的原始字符串行, 跳过表头之前的分组行 (如 'SCA 1'), 返回 (类型, 列名, 数据行)
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    for i, row in enumerate(rows):
+        kind = _table_kind(cell.strip() for cell in row)
+        if kind:
+            return kind, _canonical_header(kind, [cell.strip() for cell in row]), rows[i + 1:]
+    return None, None, []
+
+def collect_csvs(folder_path=SCRAPED_DIR, pattern='**/*.csv', exclude=EXCLUDED_DIRS):
+    """
+    按表格类型收集所有CSV的原始列 (字符串列表), 每种类型最后只构造一次DataFrame
+    """
+    columns = {kind: {'source': []} for kind in SCHEMAS}
+    n_rows = dict.fromkeys(SCHEMAS, 0)
+    folder_path = Path(folder_path)
+    for path in sorted(folder_path.glob(pattern)):
+        if any(part in exclude for part in path.relative_to(folder_path).parts):
+            continue
+        kind, header, rows = _read_raw(path)
+        if kind is None:
+            print(f"Skipping {path}: unrecognised header")
+            continue
+        
+        width = len(header)
+        values = list(zip(*[(row + [''] * width)[:width] for row in rows])) if rows else [()] * width
+        store = columns[kind]
+        for name, column in zip(header, values):
+            # columns this file doesn't have are padded for the rows before it
+            store.setdefault(name, [''] * n_rows[kind]).extend(column)
+        n_rows[kind] += len(rows)
+        store['source'].extend([str(path.relative_to(folder_path))] * len(rows))
+        for name, column in store.items():
+            if len(column) < n_rows[kind]:
+                column.extend([''] * (n_rows[kind] - len(column)))
+    return {kind: pd.DataFrame(store) for kind, store in columns.items() if n_rows[kind]}
+
+def _numeric(values):
+    # '90+3' stoppage-time minutes -> 93
+    added_time = values.str.extract(r'^(\d+)\+(\d+)$').astype('float64')
+    numbers = pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce')
+    return numbers.where(added_time[0].isna(), added_time[0] + added_time[1])
+
+def clean_table(df, kind):
+    """
+    向量化清洗一种表格: 去掉重复表头行, 空行和球队合计行, 按schema一次性转换类型, 拆分复合字段
+    """
+    df = df.apply(lambda column: column.str.strip())
+    first = 'Minute' if kind == 'shots' else 'Player'
+    data_columns = [name for name in df.columns if name != 'source']
+    repeated_header = df[first].eq(first)
+    empty = df[data_columns].eq('').all(axis=1)
+    # player tables end with a team-total footer ('17 Players', Min 1,320) that is not a player
+    footer = df['Player'].str.fullmatch(r'\d+ Players') if kind != 'shots' else False
+    df = df[~(repeated_header | empty | footer)].replace('', None)
+    
+    typed = pd.DataFrame(index=df.index)
+    for name, dtype in SCHEMAS[kind].items():
+        if name not in df:
+            continue
+        if dtype in ('string', 'category'):
+            typed[name] = df[name].astype(dtype)
+        else:
+            typed[name] = _numeric(df[name].astype('string')).astype(dtype)
+    
+    if kind != 'shots':
+        age = df['Age'].str.extract(r'^(\d+)-(\d+)$').astype('float64')
+        typed['age_years'] = age[0].astype('Int8')
+        typed['age_days'] = age[1].astype('Int16')
+        typed['age'] = (age[0] + age[1] / 365.25).astype('float32')
+        typed['primary_position'] = df['Pos'].str.split(',').str[0].astype('category')
+        if 'Club' in df:
+            club = df['Club'].str.extract(r'^(\d+)\.(?:([a-z]{2,3})\s?)?(.+)$')
+            typed['club_tier'] = pd.to_numeric(club[0]).astype('Int8')
+            typed['club_country'] = club[1].astype('category')
+            typed['club_name'] = club[2].astype('string')
+        if 'Nation' in df:
+            # 'ar ARG' from older scrapes, 'ARG' once fbref_tables drops the flag
+            typed['nation_code'] = df['Nation'].str.extract(r'^(?:[a-z]{2,3}\s?)?([A-Z]{2,3})$')[0].astype('category')
+    else:
+        # penalties are marked in the name, with or without a space: 'Lionel Messi (pen)', 'Lionel Messi(pen)'
+        penalty = typed['Player'].str.contains(r'\(pen\)$', regex=True)
+        typed['Player'] = typed['Player'].str.replace('[\\s\u00a0]*\\(pen\\)$', '', regex=True)
+        typed['is_penalty'] = penalty.fillna(False).astype(bool)
+        # the flag code is only present in older scrapes ('arArgentina', 'ar Argentina')
+        squad = df['Squad'].str.extract(r'^(?:([a-z]{2,3})\s?)?(.+)$')
+        typed['squad_code'] = squad[0].astype('category')
+        typed['squad_name'] = squad[1].astype('category')
+    
+    typed['source'] = df['source'].astype('category')
+    typed['match_key'] = match_keys(typed, kind)
+    return typed.reset_index(drop=True)
+
+def match_keys(typed, kind):
+    """
+    每行所属比赛的键: 抓取的CSV中没有比赛ID, 按来源文件从内容推导
+
+    射门表取文件中两队的队名; 球员表取文件中 (球员, 比赛日年龄) 名单的哈希,
+    同一场比赛同一球队的两份文件名单相同, 不同比赛的年龄不同.
+    """
+    keys = {}
+    for source, rows in typed.groupby('source', observed=True):
+        if kind == 'shots':
+            keys[source] = ' vs '.join(sorted(rows['squad_name'].dropna().astype(str).unique()))
+        else:
+            roster = sorted(set(zip(rows['Player'].fillna('').astype(str), rows['Age'].fillna('').astype(str))))
+            keys[source] = hashlib.sha1(repr(roster).encode('utf-8')).hexdigest()[:12]
+    return typed['source'].astype(str).map(keys).astype('string')
+
+def drop_duplicate_rows(typed, kind):
+    """
+    去掉同一场比赛被多个文件重复抓取的行, 保留字段最完整的一行, 其余行保持原顺序
+    """
+    subset = ['match_key'] + [name for name in ROW_KEYS[kind] if name in typed]
+    filled = typed.notna().sum(axis=1)
+    order = filled.sort_values(ascending=False, kind='stable').index
+    keep = ~typed.loc[order].duplicated(subset=subset)
+    return typed.loc[keep[keep].index.sort_values()].reset_index(drop=True)
+
+def consolidate_csvs(folder_path=SCRAPED_DIR, output_dir=OUTPUT_DIR, pattern='**/*.csv', exclude=EXCLUDED_DIRS):
+    """
+    合并所有抓取的CSV: 每种表格 (射门, 球员汇总, 传球类型) 写成一个带类型的Parquet文件
+
+    同一场比赛在多个文件中出现的行只保留一份.
+    """
+    tables = {
+        kind: drop_duplicate_rows(clean_table(df, kind), kind)
+        for kind, df in collect_csvs(folder_path, pattern, exclude).items()
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for kind, df in tables.items():
+        df.to_parquet(output_dir / f"{kind}.parquet", index=False)
+        print(f"{kind}: {len(df)} rows from {df['source'].nunique()} files -> {output_dir / f'{kind}.parquet'}")
+    return tables
+
+if __name__ == "__main__":
+    consolidate_csvs()
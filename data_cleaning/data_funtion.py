@@ -1,90 +1,36 @@
+import importlib
 import json
-import math
+import os
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from tqdm import tqdm
-import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import seaborn as sns
-
-def create_shot_visualizations(shots_df, output_prefix="shot_analysis"):
-    """
-    Create 2D and 3D visualizations of shot data
-    """
-    # 2D Shot Map with xG
-    plt.figure(figsize=(15, 10))
-    scatter = plt.scatter(
-        shots_df['x'],
-        shots_df['y'],
-        c=shots_df['predicted_xg'],
-        s=shots_df['is_goal']*200 + 50,
-        cmap='viridis',
-        alpha=0.6
-    )
-    
-    # Add pitch markings
-    plt.plot([120, 120], [36, 44], 'white', linewidth=2)  # Goal line
-    plt.plot([102, 102], [18, 62], 'white', linewidth=2)  # Penalty area
-    plt.plot([114, 114], [30, 50], 'white', linewidth=2)  # Six yard box
-    
-    plt.colorbar(scatter, label='Expected Goals (xG)')
-    plt.title('2D Shot Map with Expected Goals', size=14)
-    plt.xlabel('Distance from Goal Line (yards)', size=12)
-    plt.ylabel('Width Position (yards)', size=12)
-    plt.grid(True, alpha=0.3)
-    plt.savefig(f"{output_prefix}_2d.png", dpi=300, bbox_inches='tight', facecolor='white')
-    plt.close()
-    
-    # 3D Visualization
-    fig = plt.figure(figsize=(15, 10))
-    ax = fig.add_subplot(111, projection='3d')
-    
-    scatter = ax.scatter(
-        shots_df['x'],
-        shots_df['y'],
-        shots_df['predicted_xg'],
-        c=shots_df['is_goal'],
-        cmap='coolwarm',
-        s=100,
-        alpha=0.6
-    )
-    
-    ax.set_xlabel('Distance from Goal (yards)', size=12)
-    ax.set_ylabel('Width Position (yards)', size=12)
-    ax.set_zlabel('Expected Goals (xG)', size=12)
-    ax.view_init(elev=20, azim=45)
-    
-    plt.colorbar(scatter, label='Actual Goal (1) or Miss (0)')
-    plt.title('3D Shot Analysis: Location and xG', size=14)
-    plt.savefig(f"{output_prefix}_3d.png", dpi=300, bbox_inches='tight', facecolor='white')
-    plt.close()
-
-def export_shot_data(shots_df, output_file='shot_data.json'):
-    """
-    导出射门数据为JSON格式，用于可视化
-    """
-    viz_data = shots_df.apply(
-        lambda row: {
-            'x': float(row['x']),
-            'y': float(row['y']),
-            'distance': float(row['distance_to_goal']),
-            'angle': float(row['shot_angle']),
-            'goal': int(row['is_goal']),
-            'predicted_xg': float(row['predicted_xg']) if 'predicted_xg' in row else None
-        }, 
-        axis=1
-    ).tolist()
+from shot_geometry import calculate_shot_metrics_batch, freeze_frame_features
+from shot_export import export_shot_data
 
-    with open(output_file, 'w') as f:
-        json.dump(viz_data, f)
-    
-    print(f"Data exported to {output_file}")
-    return viz_data
+# Plotting and training pull in matplotlib / sklearn, so they live in their own
+# modules and are only imported the first time one of their names is used.
+_LAZY_ATTRIBUTES = {
+    'create_shot_visualizations': 'shot_plots',
+    'plot_shot_map': 'shot_plots',
+    'render_all_figures': 'shot_plots',
+    'XG_FEATURES': 'xg_training',
+    'format_xg_formula': 'xg_training',
+    'train_xg_model': 'xg_training',
+    'train_xg_model_streaming': 'xg_training',
+    'train_xg_model_gbm': 'xg_training',
+    'build_model_state': 'xg_training',
+    'update_xg_model': 'xg_training',
+    'save_model_state': 'xg_training',
+    'load_model_state': 'xg_training',
+    'compare_model_states': 'xg_training',
+    'cross_validate_xg': 'xg_selection',
+    'select_xg_model': 'xg_selection'
+}
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name), name)
 
 def calculate_shot_metrics(x, y):
     """
@@ -94,50 +40,96 @@ def calculate_shot_metrics(x, y):
         x = float(x)
         y = float(y)
         
-        GOAL_WIDTH = 8
-        GOAL_CENTER_Y = 40
-        GOAL_X = 120
-        GOAL_Y1, GOAL_Y2 = 36, 44
-        
-        # Calculate direct distance to goal
-        distance_to_goal = math.sqrt((GOAL_X-x)**2 + (GOAL_CENTER_Y-y)**2)
-        
-        # Calculate shot angle using the law of cosines
-        d1 = math.sqrt((GOAL_X-x)**2 + (GOAL_Y1-y)**2)
-        d2 = math.sqrt((GOAL_X-x)**2 + (GOAL_Y2-y)**2)
-        
-        cos_angle = (d1**2 + d2**2 - GOAL_WIDTH**2)/(2*d1*d2)
-        shot_angle = math.acos(min(1, max(-1, cos_angle)))
+        distance_to_goal, shot_angle = calculate_shot_metrics_batch(np.array([x]), np.array([y]))
+        if not (np.isfinite(distance_to_goal[0]) and np.isfinite(shot_angle[0])):
+            raise ValueError(f"shot angle undefined at ({x}, {y})")
         
         return {
             'x': x,
             'y': y,
-            'distance_to_goal': distance_to_goal,
-            'shot_angle': shot_angle
+            'distance_to_goal': float(distance_to_goal[0]),
+            'shot_angle': float(shot_angle[0])
         }
         
     except Exception as e:
         print(f"Error in calculation: {str(e)}")
         return None
 
+def _name(field):
+    return (field or {}).get('name') or ''
+
+def _parse_shot_event(event):
+    """
+    提取射门位置, 结果和射门属性, 非射门事件返回None
+    """
+    if event.get('type', {}).get('name') != 'Shot':
+        return None
+        
+    location = event.get('location')
+    if not location:
+        return None
+        
+    shot = event.get('shot', {})
+    shot_outcome = shot.get('outcome', {}).get('name')
+    return {
+        'x': float(location[0]),
+        'y': float(location[1]),
+        'is_goal': 1 if shot_outcome == 'Goal' else 0,
+        'team': _name(event.get('team')),
+        'player': _name(event.get('player')),
+        'minute': int(event.get('minute') or 0),
+        'body_part': _name(shot.get('body_part')),
+        'technique': _name(shot.get('technique')),
+        'shot_type': _name(shot.get('type')),
+        'play_pattern': _name(event.get('play_pattern')),
+        'under_pressure': 1 if event.get('under_pressure') else 0,
+        'first_time': 1 if shot.get('first_time') else 0,
+        'freeze_frame': shot.get('freeze_frame') or []
+    }
+
+def _flatten_freeze_frames(freeze_frames):
+    """
+    将每次射门的freeze frame展开为一维数组, 供向量化特征计算
+    """
+    frame_shot, frame_x, frame_y, frame_teammate, frame_keeper = [], [], [], [], []
+    for shot_idx, freeze_frame in enumerate(freeze_frames):
+        for player in freeze_frame:
+            location = player.get('location')
+            if not location:
+                continue
+            frame_shot.append(shot_idx)
+            frame_x.append(location[0])
+            frame_y.append(location[1])
+            frame_teammate.append(bool(player.get('teammate')))
+            frame_keeper.append(_name(player.get('position')) == 'Goalkeeper')
+    return frame_shot, frame_x, frame_y, frame_teammate, frame_keeper
+
+def _shot_features(x, y, freeze_frames):
+    defenders_in_cone, keeper_distance = freeze_frame_features(x, y, *_flatten_freeze_frames(freeze_frames))
+    return {'defenders_in_cone': defenders_in_cone, 'keeper_distance': keeper_distance}
+
 def process_shot_data(event):
     """
     从事件数据中提取射门信息
     """
     try:
-        if event.get('type', {}).get('name') != 'Shot':
-            return None
-            
-        location = event.get('location')
-        if not location:
+        shot = _parse_shot_event(event)
+        if not shot:
             return None
             
-        metrics = calculate_shot_metrics(location[0], location[1])
+        metrics = calculate_shot_metrics(shot['x'], shot['y'])
         if not metrics:
             return None
             
-        shot_outcome = event.get('shot', {}).get('outcome', {}).get('name')
-        metrics['is_goal'] = 1 if shot_outcome == 'Goal' else 0
+        metrics['is_goal'] = shot['is_goal']
+        for name in ('team', 'player', 'minute'):
+            metrics[name] = shot[name]
+        for name in SHOT_FEATURE_COLUMNS:
+            if name in shot:
+                metrics[name] = shot[name]
+        features = _shot_features([shot['x']], [shot['y']], [shot['freeze_frame']])
+        metrics['defenders_in_cone'] = int(features['defenders_in_cone'][0])
+        metrics['keeper_distance'] = float(features['keeper_distance'][0])
         
         return metrics
         
@@ -145,100 +137,283 @@ def process_shot_data(event):
         print(f"Error processing shot: {str(e)}")
         return None
 
-def train_xg_model(shots_df):
+SHOT_FEATURE_COLUMNS = [
+    'body_part', 'technique', 'shot_type', 'play_pattern', 'under_pressure', 'first_time',
+    'defenders_in_cone', 'keeper_distance'
+]
+SHOT_COLUMNS = ['x', 'y', 'distance_to_goal', 'shot_angle', 'is_goal', 'match_id', 'team', 'player', 'minute'] + SHOT_FEATURE_COLUMNS
+SHOT_DTYPES = {
+    'x': np.float64,
+    'y': np.float64,
+    'distance_to_goal': np.float64,
+    'shot_angle': np.float64,
+    'is_goal': np.int8,
+    'match_id': np.int32,
+    'team': np.str_,
+    'player': np.str_,
+    'minute': np.int16,
+    'body_part': np.str_,
+    'technique': np.str_,
+    'shot_type': np.str_,
+    'play_pattern': np.str_,
+    'under_pressure': np.int8,
+    'first_time': np.int8,
+    'defenders_in_cone': np.int16,
+    'keeper_distance': np.float64
+}
+DERIVED_COLUMNS = ['distance_to_goal', 'shot_angle', 'match_id', 'defenders_in_cone', 'keeper_distance']
+EVENT_COLUMNS = [name for name in SHOT_COLUMNS if name not in DERIVED_COLUMNS]
+# Minutes each player was on the pitch, read from the lineup / substitution events of the same pass
+APPEARANCE_COLUMNS = ['match_id', 'team', 'player', 'minutes']
+APPEARANCE_DTYPES = {'match_id': np.int32, 'team': np.str_, 'player': np.str_, 'minutes': np.float64}
+# Per-match arrays hold the shot columns plus the appearance columns under this prefix
+APPEARANCE_PREFIX = 'appearance_'
+PART_COLUMNS = SHOT_COLUMNS + [APPEARANCE_PREFIX + name for name in APPEARANCE_COLUMNS]
+SENDING_OFF_CARDS = ('Red Card', 'Second Yellow')
+SHOOTOUT_PERIOD = 5
+
+def match_id_from_path(file):
     """
-    训练xG模型并生成公式
+    StatsBomb事件文件以比赛ID命名, 无法识别时返回-1
     """
-    features = ['x', 'y', 'distance_to_goal', 'shot_angle']
-    
-    X = shots_df[features]
-    y = shots_df['is_goal']
-    
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    model = LogisticRegression(random_state=42)
-    model.fit(X_scaled, y)
-    
-    coefficients = model.coef_[0]
-    intercept = model.intercept_[0]
-    means = scaler.mean_
-    scales = scaler.scale_
-    
-    formula = f"""
-    xG Formula:
+    stem = Path(file).stem
+    return int(stem) if stem.isdigit() else -1
+
+def _empty_shot_columns():
+    return {name: np.empty(0, dtype=SHOT_DTYPES[name]) for name in SHOT_COLUMNS}
+
+def _concat_shot_columns(parts):
+    """
+    按顺序拼接多个列式射门数组
+    """
+    parts = list(parts)
+    if not parts:
+        return _empty_shot_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name in SHOT_COLUMNS}
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_SEPARATORS = ' \t\r\n[],'
+
+def iter_events(file, chunk_size=1 << 16):
+    """
+    逐个事件流式读取事件文件, 不把整个比赛文件载入内存
+
+    支持单个JSON数组, 多个首尾相接的数组(多赛季合并导出)以及每行一个事件的NDJSON.
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = '', 0, False
+        while True:
+            # Skip array brackets, commas and whitespace between top-level events
+            while pos < len(buffer) and buffer[pos] in _JSON_SEPARATORS:
+                pos += 1
+            if pos < len(buffer):
+                try:
+                    event, pos = _JSON_DECODER.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield event
+                    continue
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+def iter_match_shots(file, chunk_size=1 << 16):
+    """
+    流式提取射门记录, 非射门事件读取后立即丢弃
+    """
+    for event in iter_events(file, chunk_size):
+        if not isinstance(event, dict) or event.get('type', {}).get('name') != 'Shot':
+            continue
+        shot_data = process_shot_data(event)
+        if shot_data:
+            yield shot_data
+
+def _event_time(event):
+    return (event.get('minute') or 0) + (event.get('second') or 0) / 60
+
+def _track_appearance(event, entered, left):
+    """
+    记录球员上场/下场时间 (分钟): 首发阵容, 换人, 红牌和两黄变一红
+    """
+    event_type = _name(event.get('type'))
+    team = _name(event.get('team'))
+    if event_type == 'Starting XI':
+        for slot in (event.get('tactics') or {}).get('lineup') or []:
+            entered[(team, _name(slot.get('player')))] = 0.0
+    elif event_type == 'Substitution':
+        entered[(team, _name((event.get('substitution') or {}).get('replacement')))] = _event_time(event)
+        left[(team, _name(event.get('player')))] = _event_time(event)
+    elif event_type in ('Foul Committed', 'Bad Behaviour'):
+        card = (event.get(event_type.lower().replace(' ', '_')) or {}).get('card')
+        if _name(card) in SENDING_OFF_CARDS:
+            # a player sent off from the bench after being substituted keeps the substitution time
+            left.setdefault((team, _name(event.get('player'))), _event_time(event))
+
+def _appearance_columns(match_id, entered, left, end):
+    keys = list(entered)
+    minutes = [max(left.get(key, end) - entered[key], 0.0) for key in keys]
+    columns = {
+        'match_id': np.full(len(keys), match_id),
+        'team': [team for team, _ in keys],
+        'player': [player for _, player in keys],
+        'minutes': minutes
+    }
+    return {APPEARANCE_PREFIX + name: np.asarray(columns[name], dtype=APPEARANCE_DTYPES[name]) for name in APPEARANCE_COLUMNS}
+
+def extract_match_shots(file):
+    """
+    从单个比赛事件文件中提取射门, 返回列式数组
+
+    逐事件只解析位置, 结果和射门属性; 距离, 角度和freeze frame特征在整场比赛上一次性向量化计算.
+    同一遍读取中记录每名球员的出场时间 (首发/换人/红牌, 比赛结束取最后一个非点球大战事件的时间),
+    以 APPEARANCE_PREFIX 开头的列返回.
+    """
+    raw = {name: [] for name in EVENT_COLUMNS}
+    freeze_frames = []
+    entered, left, end = {}, {}, 0.0
+    for event in iter_events(file):
+        if not isinstance(event, dict):
+            continue
+        if event.get('period') != SHOOTOUT_PERIOD:
+            end = max(end, _event_time(event))
+        _track_appearance(event, entered, left)
+        try:
+            shot = _parse_shot_event(event)
+        except Exception as e:
+            print(f"Error processing shot: {str(e)}")
+            continue
+        if shot:
+            for name in raw:
+                raw[name].append(shot[name])
+            freeze_frames.append(shot['freeze_frame'])
     
-    1. Standardize variables:
-        x_std = (x - {means[0]:.3f}) / {scales[0]:.3f}
-        y_std = (y - {means[1]:.3f}) / {scales[1]:.3f}
-        distance_std = (distance_to_goal - {means[2]:.3f}) / {scales[2]:.3f}
-        angle_std = (shot_angle - {means[3]:.3f}) / {scales[3]:.3f}
+    columns = {name: np.asarray(raw[name], dtype=SHOT_DTYPES[name]) for name in EVENT_COLUMNS}
+    columns['distance_to_goal'], columns['shot_angle'] = calculate_shot_metrics_batch(columns['x'], columns['y'])
+    match_id = match_id_from_path(file)
+    columns['match_id'] = np.full(len(columns['x']), match_id, dtype=SHOT_DTYPES['match_id'])
+    columns.update(_shot_features(columns['x'], columns['y'], freeze_frames))
     
-    2. Calculate log odds:
-        log_odds = {intercept:.3f} + 
-                   {coefficients[0]:.3f} * x_std + 
-                   {coefficients[1]:.3f} * y_std + 
-                   {coefficients[2]:.3f} * distance_std + 
-                   {coefficients[3]:.3f} * angle_std
+    # Same rows process_shot_data would reject (angle undefined on the posts)
+    valid = np.isfinite(columns['distance_to_goal']) & np.isfinite(columns['shot_angle'])
+    if not valid.all():
+        columns = {name: values[valid] for name, values in columns.items()}
+    part = {name: columns[name].astype(SHOT_DTYPES[name], copy=False) for name in SHOT_COLUMNS}
+    part.update(_appearance_columns(match_id, entered, left, end))
+    return part
+
+def _extract_shots_batch(files):
+    """
+    工作进程: 处理一组比赛文件, 每个文件只返回紧凑的列式数组
+    """
+    return [extract_match_shots(file) for file in files]
+
+def _split_batches(items, n_batches):
+    # Contiguous batches keep the output order identical to the serial path
+    n_batches = max(1, min(n_batches, len(items)))
+    size, extra = divmod(len(items), n_batches)
+    batches, start = [], 0
+    for i in range(n_batches):
+        end = start + size + (1 if i < extra else 0)
+        batches.append(items[start:end])
+        start = end
+    return batches
+
+def extract_files(files, workers=1, batches_per_worker=4):
+    """
+    提取一组比赛文件的射门, 按文件顺序返回每个文件的列式数组
+    """
+    from tqdm import tqdm
     
-    3. Convert to probability:
-        xG = 1 / (1 + exp(-log_odds))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(files) <= 1:
+        return [extract_match_shots(file) for file in tqdm(files)]
     
-    Feature coefficients:
-    x: {coefficients[0]:.3f}
-    y: {coefficients[1]:.3f}
-    distance_to_goal: {coefficients[2]:.3f}
-    shot_angle: {coefficients[3]:.3f}
-    """
+    from concurrent.futures import ProcessPoolExecutor
     
-    return model, scaler, formula
+    batches = _split_batches(files, workers * batches_per_worker)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(tqdm(executor.map(_extract_shots_batch, batches), total=len(batches)))
+    return [part for batch in results for part in batch]
 
-def process_files(folder_path):
+def process_files(folder_path, workers=1, batches_per_worker=4, cache_dir=None, with_minutes=False):
     """
     处理所有事件文件
+
+    workers > 1 时使用进程池并行提取; workers=None 使用全部CPU核心.
+    文件按名称排序, 并行与串行结果完全一致.
+    指定 cache_dir 时只重新提取新增或修改过的比赛文件, 其余从缓存读取.
+    with_minutes=True 时返回 (射门表, 出场时间表), 出场时间表的列为 APPEARANCE_COLUMNS.
     """
-    files = list(Path(folder_path).glob('*.json'))
-    all_shots = []
+    import pandas as pd
+    
+    files = sorted(Path(folder_path).glob('*.json'))
     
     print(f"Processing {len(files)} files...")
-    for file in tqdm(files):
-        with open(file, 'r', encoding='utf-8') as f:
-            match_data = json.load(f)
-            
-        for event in match_data:
-            shot_data = process_shot_data(event)
-            if shot_data:
-                all_shots.append(shot_data)
+    extract = lambda changed: extract_files(changed, workers, batches_per_worker)
+    if cache_dir is None:
+        parts = extract(files)
+    else:
+        from shot_cache import load_shot_cache
+        parts = load_shot_cache(files, cache_dir, extract, PART_COLUMNS)
     
-    return pd.DataFrame(all_shots)
+    shots_df = pd.DataFrame(_concat_shot_columns(parts), columns=SHOT_COLUMNS)
+    if not with_minutes:
+        return shots_df
+    minutes_df = pd.DataFrame({
+        name: np.concatenate([part[APPEARANCE_PREFIX + name] for part in parts]) if parts else np.empty(0, dtype=APPEARANCE_DTYPES[name])
+        for name in APPEARANCE_COLUMNS
+    })
+    return shots_df, minutes_df
 
-def plot_shot_map(shots_df, output_file='shot_map.png'):
+def add_match_partitions(shots_df, matches_dir):
     """
-    生成射门分布图
+    按比赛信息 (open-data/data/matches) 给射门表加上 competition_id 和 season_id 列
+
+    比赛信息目录不存在时原样返回; 找不到的比赛取 -1, 与射门库的分区值一致.
+    """
+    if not Path(matches_dir).exists():
+        return shots_df
+    from shot_store import _with_partitions, load_match_index
+    return _with_partitions(shots_df, load_match_index(matches_dir))
+
+def load_shots(data_path, workers=1, cache_dir=None, store_path=None, with_minutes=False):
+    """
+    加载射门表
+
+    data_path 为None时直接读取 store_path 中的Parquet射门库, 不再解析JSON;
+    否则解析事件文件, 并在指定 store_path 时写入射门库.
+    两种方式得到的射门表都带有 competition_id 和 season_id 列 (有比赛信息时).
+    with_minutes=True 时返回 (射门表, 出场时间表); 射门库不含出场时间, 此时出场时间表为None.
     """
-    import matplotlib.pyplot as plt
+    if data_path is None:
+        from shot_store import read_shot_store
+        shots_df = read_shot_store(store_path)
+        return (shots_df, None) if with_minutes else shots_df
     
-    plt.figure(figsize=(12, 8))
-    scatter = plt.scatter(
-        shots_df['x'],
-        shots_df['y'],
-        c=shots_df['predicted_xg'],
-        s=100,
-        cmap='YlOrRd',
-        alpha=0.6
-    )
-    plt.colorbar(scatter, label='Expected Goals (xG)')
-    plt.title('Shot Map with xG Values')
-    plt.xlabel('Field Length (yards)')
-    plt.ylabel('Field Width (yards)')
-    plt.savefig(output_file)
-    plt.close()
-
-def main(data_path, output_file):
+    shots_df, minutes_df = process_files(data_path, workers=workers, cache_dir=cache_dir, with_minutes=True)
+    shots_df = add_match_partitions(shots_df, Path(data_path).parent / 'matches')
+    minutes_df = add_match_partitions(minutes_df, Path(data_path).parent / 'matches')
+    if store_path is not None:
+        from shot_store import write_shot_store
+        write_shot_store(shots_df, store_path, matches_dir=Path(data_path).parent / 'matches')
+    return (shots_df, minutes_df) if with_minutes else shots_df
+
+def main(data_path, output_file, workers=1, cache_dir=None, store_path=None, artifact_file='xg_model.json',
+         tiles_dir='shot_tiles', plot_workers=None, grid_file='xg_grid.json', evaluation_file='xg_evaluation.json',
+         rollups_dir='shot_rollups'):
     """
     主函数
     """
-    shots_df = process_files(data_path)
+    from shot_plots import render_all_figures
+    from xg_training import XG_FEATURES, train_xg_model
+    
+    shots_df, minutes_df = load_shots(data_path, workers=workers, cache_dir=cache_dir, store_path=store_path,
+                                      with_minutes=True)
     if len(shots_df) == 0:
         raise ValueError("No shot data found")
     
@@ -249,18 +424,37 @@ def main(data_path, output_file):
     model, scaler, formula = train_xg_model(shots_df)
     
     # Add predicted xG values
-    X = shots_df[['x', 'y', 'distance_to_goal', 'shot_angle']]
+    X = shots_df[XG_FEATURES]
     X_scaled = scaler.transform(X)
     shots_df['predicted_xg'] = model.predict_proba(X_scaled)[:, 1]
-    create_shot_visualizations(shots_df)
+    # Calibration report: reliability bins, Brier score, log loss, AUC, per-team tables
+    from xg_evaluation import evaluate_xg, write_evaluation_report
+    write_evaluation_report(evaluate_xg(shots_df), evaluation_file)
+    # Create visualizations (2D/3D analysis and shot map rendered concurrently)
+    render_all_figures(shots_df, figures=('2d', '3d', 'shot_map'), workers=plot_workers)
     # Export data for visualization
     export_shot_data(shots_df, 'shot_data.json')
-    # Create visualizations
-    plot_shot_map(shots_df)
+    # Level-of-detail pitch aggregates; a retrained model changes every cell, so rebuild them
+    from shot_tiles import build_tiles, save_tiles
+    save_tiles(build_tiles(shots_df), tiles_dir)
+    # Player / team / match / season xG rollups, rebuilt for the same reason
+    from shot_rollups import build_rollups, rollup_table, save_rollups
+    rollups = build_rollups(shots_df, minutes_df)
+    save_rollups(rollups, rollups_dir)
+    print("\nTop players by xG:")
+    print(rollup_table(rollups, 'player').head(10).to_string(index=False))
     
     with open(output_file, 'w') as f:
         f.write(formula)
     
+    from xg_scorer import save_model_artifact, prepare_artifact
+    artifact = prepare_artifact(save_model_artifact(model, scaler, artifact_file, XG_FEATURES))
+    
+    # Lookup grid for constant-time scoring of pitch locations (live feeds, front end)
+    from xg_grid import build_xg_grid, grid_error_bound, save_xg_grid
+    grid = build_xg_grid(artifact)
+    save_xg_grid(grid, grid_file, error=grid_error_bound(grid, artifact))
+    
     return shots_df, model, scaler
 
 if __name__ == "__main__":
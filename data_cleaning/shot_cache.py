@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+CACHE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+# Modules whose code decides what an extracted match looks like (event parsing, geometry, freeze-frame features)
+EXTRACTOR_MODULES = ('data_funtion', 'shot_geometry')
+MODULE_DIR = Path(__file__).resolve().parent
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    计算文件内容的SHA-1
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def extractor_digest(modules=EXTRACTOR_MODULES):
+    """
+    提取代码的摘要: 各模块源文件内容哈希的组合, 任何一个模块改动都会改变摘要
+    """
+    digest = hashlib.sha1()
+    for module in modules:
+        digest.update(f"{module}:{file_digest(MODULE_DIR / f'{module}.py')}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _read_manifest(cache_dir, columns, code):
+    manifest_path = Path(cache_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    # A different cache format, column layout or extractor code invalidates every entry
+    if (manifest.get('version') != CACHE_VERSION or manifest.get('columns') != list(columns)
+            or manifest.get('code') != code):
+        for cache_file in Path(cache_dir).glob('*.npz'):
+            cache_file.unlink()
+        return {}
+    return manifest.get('files', {})
+
+def _write_manifest(cache_dir, columns, code, entries):
+    manifest_path = Path(cache_dir) / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'columns': list(columns), 'code': code, 'files': entries}, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+def _is_fresh(path, entry):
+    """
+    判断缓存条目是否仍然有效: mtime和大小一致直接命中, 仅mtime变化时再比较内容哈希
+    """
+    if entry is None:
+        return False
+    signature = _file_signature(path)
+    if signature['size'] != entry['size']:
+        return False
+    if signature['mtime_ns'] == entry['mtime_ns']:
+        return True
+    if file_digest(path) == entry['sha1']:
+        entry['mtime_ns'] = signature['mtime_ns']
+        return True
+    return False
+
+def load_shot_cache(files, cache_dir, extract, columns, code=None):
+    """
+    按比赛文件增量缓存射门数据
+
+    每个比赛文件对应一个 .npz 列式缓存, manifest.json 记录其 mtime/大小/SHA-1.
+    manifest 同时记录提取代码的摘要 (code, 默认为 extractor_digest()), 代码改动后全部缓存失效.
+    只把新增或修改过的文件交给 extract(files) 重新提取, 已删除文件的缓存会被清除.
+    按 files 的顺序返回每个文件的列式数组.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    code = extractor_digest() if code is None else code
+    entries = _read_manifest(cache_dir, columns, code)
+    
+    files = [Path(file) for file in files]
+    names = [file.name for file in files]
+    changed = [file for file in files if not _is_fresh(file, entries.get(file.name))]
+    
+    # Evict entries whose source match file no longer exists
+    evicted = set(entries) - set(names)
+    for name in evicted:
+        cache_file = cache_dir / entries.pop(name)['cache_file']
+        if cache_file.exists():
+            cache_file.unlink()
+    
+    print(f"Shot cache: {len(files) - len(changed)} cached, {len(changed)} to extract, {len(evicted)} evicted")
+    fresh_parts = {}
+    if changed:
+        for file, part in zip(changed, extract(changed)):
+            cache_file = f"{file.stem}.npz"
+            np.savez(cache_dir / cache_file, **{name: part[name] for name in columns})
+            entries[file.name] = {
+                **_file_signature(file),
+                'sha1': file_digest(file),
+                'cache_file': cache_file
+            }
+            fresh_parts[file.name] = part
+    
+    _write_manifest(cache_dir, columns, code, entries)
+    
+    parts = []
+    for name in names:
+        if name in fresh_parts:
+            parts.append(fresh_parts[name])
+        else:
+            with np.load(cache_dir / entries[name]['cache_file']) as cached:
+                parts.append({column: cached[column] for column in columns})
+    return parts
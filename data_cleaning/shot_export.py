@@ -0,0 +1,165 @@
+import json
+import numpy as np
+from pathlib import Path
+
+# Output field name -> shots_df column
+EXPORT_FIELDS = {
+    'x': 'x',
+    'y': 'y',
+    'distance': 'distance_to_goal',
+    'angle': 'shot_angle',
+    'goal': 'is_goal',
+    'predicted_xg': 'predicted_xg'
+}
+EXPORT_FORMATS = {'.json': 'json', '.ndjson': 'ndjson', '.bin': 'binary', '.arrow': 'arrow'}
+BINARY_MAGIC = b'XGSHOTS1'
+NDJSON_CHUNK_ROWS = 1 << 17
+
+def _export_frame(shots_df):
+    """
+    按导出字段名取出列, 不逐行构造字典
+    """
+    import pandas as pd
+    
+    columns = {}
+    for field, column in EXPORT_FIELDS.items():
+        if column in shots_df:
+            values = shots_df[column].to_numpy()
+            columns[field] = values.astype(np.int8) if field == 'goal' else values.astype(np.float64)
+        else:
+            columns[field] = None
+    return pd.DataFrame(columns)
+
+def _quantize(values, bits=16):
+    """
+    线性量化为无符号整数, 还原: value = base + q * scale
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dtype = np.uint16 if bits == 16 else np.uint8
+    levels = np.iinfo(dtype).max
+    low, high = (float(np.min(values)), float(np.max(values))) if len(values) else (0.0, 0.0)
+    scale = (high - low) / levels if high > low else 1.0
+    quantized = np.rint((values - low) / scale).astype(dtype)
+    return quantized, {'base': low, 'scale': scale}
+
+def _typed_columns(shots_df, quantize=False):
+    """
+    生成紧凑的列数组: 浮点列为float32 (或量化的uint16), 进球标记为uint8
+    """
+    columns = {}
+    for field, column in EXPORT_FIELDS.items():
+        if column not in shots_df:
+            continue
+        values = shots_df[column].to_numpy()
+        if field == 'goal':
+            columns[field] = (values.astype(np.uint8), None)
+        elif quantize:
+            columns[field] = _quantize(values)
+        else:
+            columns[field] = (values.astype(np.float32), None)
+    return columns
+
+def _write_json(shots_df, output_file, lines=False, double_precision=6):
+    frame = _export_frame(shots_df)
+    if not lines:
+        frame.to_json(output_file, orient='records', double_precision=double_precision)
+        return
+    # Stream NDJSON in fixed-size row chunks so memory stays bounded
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for start in range(0, len(frame), NDJSON_CHUNK_ROWS):
+            chunk = frame.iloc[start:start + NDJSON_CHUNK_ROWS]
+            f.write(chunk.to_json(orient='records', lines=True, double_precision=double_precision).rstrip('\n'))
+            f.write('\n')
+
+def _write_binary(shots_df, output_file, quantize=False):
+    """
+    二进制列式格式, 前端可直接用 TypedArray 读取:
+    8字节标识 | uint32 头部长度 | JSON头部 | 按8字节对齐的各列数据
+    头部记录行数以及每列的 dtype, 偏移量和量化参数.
+    """
+    columns = _typed_columns(shots_df, quantize)
+    header = {'rows': len(shots_df), 'columns': []}
+    offset = 0
+    for field, (values, quantization) in columns.items():
+        entry = {'name': field, 'dtype': values.dtype.name, 'offset': offset, 'bytes': values.nbytes}
+        if quantization:
+            entry.update(quantization)
+        header['columns'].append(entry)
+        offset += -(-values.nbytes // 8) * 8
+    
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix_len = len(BINARY_MAGIC) + 4 + len(header_bytes)
+    header_bytes += b' ' * (-prefix_len % 8)
+    data_start = len(BINARY_MAGIC) + 4 + len(header_bytes)
+    
+    with open(output_file, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(np.uint32(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for entry, (values, _) in zip(header['columns'], columns.values()):
+            f.seek(data_start + entry['offset'])
+            f.write(values.astype(values.dtype.newbyteorder('<'), copy=False).tobytes())
+
+def read_binary_export(path):
+    """
+    读取二进制导出文件, 量化列会还原为float32
+    """
+    raw = np.fromfile(path, dtype=np.uint8)
+    if raw[:len(BINARY_MAGIC)].tobytes() != BINARY_MAGIC:
+        raise ValueError(f"Not a shot export file: {path}")
+    header_len = int(raw[len(BINARY_MAGIC):len(BINARY_MAGIC) + 4].view('<u4')[0])
+    header_start = len(BINARY_MAGIC) + 4
+    header = json.loads(raw[header_start:header_start + header_len].tobytes())
+    data_start = header_start + header_len
+    
+    columns = {}
+    for entry in header['columns']:
+        start = data_start + entry['offset']
+        values = raw[start:start + entry['bytes']].view(np.dtype(entry['dtype']).newbyteorder('<'))
+        if 'scale' in entry:
+            values = np.float32(entry['base']) + values.astype(np.float32) * np.float32(entry['scale'])
+        columns[entry['name']] = values
+    return columns
+
+def _write_arrow(shots_df, output_file, quantize=False, compression=None):
+    """
+    Arrow IPC文件; 量化参数写在字段的metadata中
+    """
+    import pyarrow as pa
+    
+    arrays, fields = [], []
+    for field, (values, quantization) in _typed_columns(shots_df, quantize).items():
+        metadata = {key: str(value) for key, value in quantization.items()} if quantization else None
+        arrays.append(pa.array(values))
+        fields.append(pa.field(field, arrays[-1].type, metadata=metadata))
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(str(output_file), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+def export_shot_data(shots_df, output_file='shot_data.json', format=None, quantize=False):
+    """
+    导出射门数据用于可视化, 直接由列数组生成
+
+    format 可选 'json', 'ndjson' (分块流式写出), 'binary' (TypedArray列式) 或 'arrow',
+    默认根据文件后缀判断. quantize=True 时二进制/Arrow格式的浮点列量化为uint16.
+    返回导出的射门数量.
+    """
+    if format is None:
+        format = EXPORT_FORMATS.get(Path(output_file).suffix.lower(), 'json')
+    
+    if format == 'json':
+        _write_json(shots_df, output_file)
+    elif format == 'ndjson':
+        _write_json(shots_df, output_file, lines=True)
+    elif format == 'binary':
+        _write_binary(shots_df, output_file, quantize)
+    elif format == 'arrow':
+        _write_arrow(shots_df, output_file, quantize)
+    else:
+        raise ValueError(f"Unknown export format: {format}")
+    
+    print(f"Data exported to {output_file}")
+    return len(shots_df)
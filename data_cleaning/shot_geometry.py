@@ -0,0 +1,79 @@
+import numpy as np
+
+# Pitch geometry in StatsBomb coordinates (yards)
+GOAL_WIDTH = 8
+GOAL_CENTER_Y = 40
+GOAL_X = 120
+GOAL_Y1, GOAL_Y2 = 36, 44
+
+def calculate_shot_metrics_batch(x, y=None, out=None):
+    """
+    向量化计算射门距离和角度
+
+    x, y 为坐标数组; 也可以只传入含有 'x', 'y' 列的DataFrame.
+    out 可传入预分配的 (distance_to_goal, shot_angle) 输出数组.
+    无法计算的位置(例如正好在门柱上)返回 NaN.
+    """
+    if y is None:
+        x, y = x['x'], x['y']
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    if out is None:
+        distance_to_goal = np.empty(x.shape, dtype=np.float64)
+        shot_angle = np.empty(x.shape, dtype=np.float64)
+    else:
+        distance_to_goal, shot_angle = out
+    
+    dx2 = np.square(GOAL_X - x)
+    
+    # Calculate direct distance to goal
+    np.sqrt(dx2 + np.square(GOAL_CENTER_Y - y), out=distance_to_goal)
+    
+    # Calculate shot angle using the law of cosines
+    d1_sq = dx2 + np.square(GOAL_Y1 - y)
+    d2_sq = dx2 + np.square(GOAL_Y2 - y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = (d1_sq + d2_sq - GOAL_WIDTH**2) / (2 * np.sqrt(d1_sq * d2_sq))
+    np.clip(cos_angle, -1, 1, out=cos_angle)
+    np.arccos(cos_angle, out=shot_angle)
+    
+    return distance_to_goal, shot_angle
+
+def freeze_frame_features(shot_x, shot_y, frame_shot, frame_x, frame_y, frame_teammate, frame_keeper):
+    """
+    向量化计算freeze frame特征
+
+    所有射门的freeze frame球员展开为一维数组, frame_shot 为每个球员所属射门的下标.
+    返回每次射门射门三角区(射门点与两根门柱)内的对方防守球员数量,
+    以及射门点到对方门将的距离(没有门将信息时为 NaN).
+    """
+    shot_x = np.asarray(shot_x, dtype=np.float64)
+    shot_y = np.asarray(shot_y, dtype=np.float64)
+    frame_shot = np.asarray(frame_shot, dtype=np.intp)
+    frame_x = np.asarray(frame_x, dtype=np.float64)
+    frame_y = np.asarray(frame_y, dtype=np.float64)
+    opponent = ~np.asarray(frame_teammate, dtype=bool)
+    keeper = np.asarray(frame_keeper, dtype=bool) & opponent
+    n_shots = len(shot_x)
+    
+    sx, sy = shot_x[frame_shot], shot_y[frame_shot]
+    
+    # Point-in-triangle test via the sign of the cross product against each edge
+    def edge_side(ax, ay, bx, by):
+        return (bx - ax) * (frame_y - ay) - (by - ay) * (frame_x - ax)
+    
+    s1 = edge_side(sx, sy, GOAL_X, GOAL_Y1)
+    s2 = edge_side(GOAL_X, GOAL_Y1, GOAL_X, GOAL_Y2)
+    s3 = edge_side(GOAL_X, GOAL_Y2, sx, sy)
+    has_neg = (s1 < 0) | (s2 < 0) | (s3 < 0)
+    has_pos = (s1 > 0) | (s2 > 0) | (s3 > 0)
+    in_cone = ~(has_neg & has_pos)
+    
+    defenders_in_cone = np.bincount(frame_shot[in_cone & opponent & ~keeper], minlength=n_shots)
+    
+    keeper_distance = np.full(n_shots, np.nan)
+    keeper_idx = np.flatnonzero(keeper)
+    keeper_distance[frame_shot[keeper_idx]] = np.hypot(frame_x[keeper_idx] - sx[keeper_idx], frame_y[keeper_idx] - sy[keeper_idx])
+    
+    return defenders_in_cone, keeper_distance
@@ -0,0 +1,295 @@
+import os
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+
+# Above this many shots the scatter plots switch to binned rasters
+RASTER_THRESHOLD = 50000
+RASTER_BIN_SIZE = 0.5
+SURFACE_BIN_SIZE = 2
+HEATMAP_ZONES = 10
+ANGLE_DISTANCE_BINS = (200, 100)
+
+def bin_shots(x, y, values=None, bin_size=RASTER_BIN_SIZE):
+    """
+    按球场网格统计射门数以及 values 的格内平均值 (空格子为 NaN)
+    """
+    x_edges = np.arange(0, 120 + bin_size, bin_size)
+    y_edges = np.arange(0, 80 + bin_size, bin_size)
+    counts, _, _ = np.histogram2d(y, x, bins=[y_edges, x_edges])
+    mean = None
+    if values is not None:
+        sums, _, _ = np.histogram2d(y, x, bins=[y_edges, x_edges], weights=values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(counts > 0, sums / counts, np.nan)
+    return counts, mean, x_edges, y_edges
+
+def _binned_mean(a, b, values, a_edges, b_edges):
+    counts, _, _ = np.histogram2d(b, a, bins=[b_edges, a_edges])
+    sums, _, _ = np.histogram2d(b, a, bins=[b_edges, a_edges], weights=values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts, np.where(counts > 0, sums / counts, np.nan)
+
+def _zone_edges(values, zones=HEATMAP_ZONES):
+    # Equal-width zones over the data range, like pd.cut(values, bins=zones)
+    low, high = float(np.min(values)), float(np.max(values))
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, zones + 1)
+
+def _use_raster(shots_df, raster):
+    return len(shots_df) > RASTER_THRESHOLD if raster is None else raster
+
+def compute_plot_data(shots_df, raster=None, figures=('2d', '3d', 'heatmap', 'angle_distance', 'shot_map')):
+    """
+    一次扫描射门表, 计算所有图共用的分格聚合
+
+    小数据集保留原始点; 大数据集只保留分格结果, 因此传给绘图进程的数据量与射门数无关.
+    """
+    raster = _use_raster(shots_df, raster)
+    x = shots_df['x'].to_numpy(dtype=np.float64)
+    y = shots_df['y'].to_numpy(dtype=np.float64)
+    xg = shots_df['predicted_xg'].to_numpy(dtype=np.float64)
+    goal = shots_df['is_goal'].to_numpy().astype(np.float64)
+    
+    data = {'raster': raster}
+    if not raster:
+        data['points'] = {'x': x, 'y': y, 'predicted_xg': xg, 'is_goal': goal}
+        if 'angle_distance' in figures:
+            data['points']['distance_to_goal'] = shots_df['distance_to_goal'].to_numpy(dtype=np.float64)
+            data['points']['shot_angle'] = shots_df['shot_angle'].to_numpy(dtype=np.float64)
+    else:
+        if {'2d', 'shot_map'} & set(figures):
+            _, mean_xg, x_edges, y_edges = bin_shots(x, y, xg, RASTER_BIN_SIZE)
+            data['raster_xg'] = (mean_xg, x_edges, y_edges)
+        if '3d' in figures:
+            counts, mean_xg, x_edges, y_edges = bin_shots(x, y, xg, SURFACE_BIN_SIZE)
+            _, goal_rate, _, _ = bin_shots(x, y, goal, SURFACE_BIN_SIZE)
+            data['surface'] = (counts, mean_xg, goal_rate, x_edges, y_edges)
+        if 'angle_distance' in figures:
+            distance = shots_df['distance_to_goal'].to_numpy(dtype=np.float64)
+            angle = shots_df['shot_angle'].to_numpy(dtype=np.float64)
+            d_edges = np.linspace(0, float(np.max(distance)) if len(distance) else 1.0, ANGLE_DISTANCE_BINS[0] + 1)
+            a_edges = np.linspace(0, np.pi, ANGLE_DISTANCE_BINS[1] + 1)
+            _, mean_xg = _binned_mean(distance, angle, xg, d_edges, a_edges)
+            data['angle_distance'] = (mean_xg, d_edges, a_edges)
+    
+    if 'heatmap' in figures:
+        x_edges, y_edges = _zone_edges(x), _zone_edges(y)
+        _, mean_xg = _binned_mean(x, y, xg, x_edges, y_edges)
+        data['heatmap'] = (mean_xg, x_edges, y_edges)
+    return data
+
+def _draw_image(mean, x_edges, y_edges, cmap):
+    return plt.imshow(
+        np.ma.masked_invalid(mean),
+        origin='lower',
+        extent=[x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]],
+        cmap=cmap,
+        aspect='auto',
+        interpolation='nearest'
+    )
+
+def render_2d(data, output_file):
+    """
+    2D射门图
+    """
+    plt.figure(figsize=(15, 10))
+    if data['raster']:
+        scatter = _draw_image(*data['raster_xg'], 'viridis')
+    else:
+        points = data['points']
+        scatter = plt.scatter(
+            points['x'],
+            points['y'],
+            c=points['predicted_xg'],
+            s=points['is_goal']*200 + 50,
+            cmap='viridis',
+            alpha=0.6
+        )
+    
+    # Add pitch markings
+    plt.plot([120, 120], [36, 44], 'white', linewidth=2)  # Goal line
+    plt.plot([102, 102], [18, 62], 'white', linewidth=2)  # Penalty area
+    plt.plot([114, 114], [30, 50], 'white', linewidth=2)  # Six yard box
+    
+    plt.colorbar(scatter, label='Expected Goals (xG)')
+    plt.title('2D Shot Map with Expected Goals', size=14)
+    plt.xlabel('Distance from Goal Line (yards)', size=12)
+    plt.ylabel('Width Position (yards)', size=12)
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+
+def render_3d(data, output_file):
+    """
+    3D射门图; 大数据集绘制分格平均xG曲面, 颜色为实际进球率
+    """
+    fig = plt.figure(figsize=(15, 10))
+    ax = fig.add_subplot(111, projection='3d')
+    
+    if data['raster']:
+        counts, mean_xg, goal_rate, x_edges, y_edges = data['surface']
+        X, Y = np.meshgrid((x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2)
+        cmap = plt.get_cmap('coolwarm')
+        facecolors = cmap(np.nan_to_num(goal_rate))
+        facecolors[counts == 0, 3] = 0  # Leave bins without shots transparent
+        ax.plot_surface(
+            X, Y, np.nan_to_num(mean_xg),
+            facecolors=facecolors,
+            rstride=1, cstride=1, linewidth=0, antialiased=False, shade=False
+        )
+        scatter = plt.cm.ScalarMappable(cmap=cmap, norm=plt.Normalize(0, 1))
+        colorbar_label = 'Observed Goal Rate per Bin'
+    else:
+        points = data['points']
+        scatter = ax.scatter(
+            points['x'],
+            points['y'],
+            points['predicted_xg'],
+            c=points['is_goal'],
+            cmap='coolwarm',
+            s=100,
+            alpha=0.6
+        )
+        colorbar_label = 'Actual Goal (1) or Miss (0)'
+    
+    ax.set_xlabel('Distance from Goal (yards)', size=12)
+    ax.set_ylabel('Width Position (yards)', size=12)
+    ax.set_zlabel('Expected Goals (xG)', size=12)
+    ax.view_init(elev=20, azim=45)
+    
+    plt.colorbar(scatter, ax=ax, label=colorbar_label)
+    plt.title('3D Shot Analysis: Location and xG', size=14)
+    plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close()
+
+def render_heatmap(data, output_file):
+    """
+    分区平均xG热图
+    """
+    import seaborn as sns
+    
+    mean_xg, x_edges, y_edges = data['heatmap']
+    interval = lambda edges: [f"({lo:.1f}, {hi:.1f}]" for lo, hi in zip(edges[:-1], edges[1:])]
+    
+    plt.figure(figsize=(15, 10))
+    sns.heatmap(
+        mean_xg,
+        xticklabels=interval(x_edges),
+        yticklabels=interval(y_edges),
+        cmap='YlOrRd',
+        annot=True,
+        fmt='.3f',
+        cbar_kws={'label': 'Average xG'}
+    )
+    plt.title('Shot Location Heat Map (Average xG by Zone)', pad=20)
+    plt.xlabel('Distance from Goal Line')
+    plt.ylabel('Width Position')
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+
+def render_angle_distance(data, output_file):
+    """
+    射门角度与距离关系图
+    """
+    plt.figure(figsize=(12, 8))
+    if data['raster']:
+        _draw_image(*data['angle_distance'], 'viridis')
+    else:
+        points = data['points']
+        plt.scatter(
+            points['distance_to_goal'],
+            points['shot_angle'],
+            c=points['predicted_xg'],
+            s=points['is_goal']*200 + 50,
+            cmap='viridis',
+            alpha=0.6
+        )
+    plt.colorbar(label='Expected Goals (xG)')
+    plt.title('Shot Angle vs Distance Analysis', pad=20)
+    plt.xlabel('Distance to Goal (yards)')
+    plt.ylabel('Shot Angle (radians)')
+    plt.grid(True, alpha=0.3)
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+
+def render_shot_map(data, output_file):
+    """
+    生成射门分布图
+    """
+    plt.figure(figsize=(12, 8))
+    if data['raster']:
+        scatter = _draw_image(*data['raster_xg'], 'YlOrRd')
+    else:
+        points = data['points']
+        scatter = plt.scatter(
+            points['x'],
+            points['y'],
+            c=points['predicted_xg'],
+            s=100,
+            cmap='YlOrRd',
+            alpha=0.6
+        )
+    plt.colorbar(scatter, label='Expected Goals (xG)')
+    plt.title('Shot Map with xG Values')
+    plt.xlabel('Field Length (yards)')
+    plt.ylabel('Field Width (yards)')
+    plt.savefig(output_file)
+    plt.close()
+
+FIGURE_RENDERERS = {
+    '2d': render_2d,
+    '3d': render_3d,
+    'heatmap': render_heatmap,
+    'angle_distance': render_angle_distance,
+    'shot_map': render_shot_map
+}
+
+def create_shot_visualizations(shots_df, output_prefix="shot_analysis", raster=None):
+    """
+    Create 2D and 3D visualizations of shot data
+
+    With more than RASTER_THRESHOLD shots (or raster=True) the 2D map shows the
+    binned mean xG instead of one marker per shot, and the 3D plot is a surface
+    of binned mean xG coloured by the observed goal rate.
+    """
+    data = compute_plot_data(shots_df, raster, figures=('2d', '3d'))
+    render_2d(data, f"{output_prefix}_2d.png")
+    render_3d(data, f"{output_prefix}_3d.png")
+
+def plot_shot_map(shots_df, output_file='shot_map.png', raster=None):
+    """
+    生成射门分布图, 射门数量很大时绘制分格平均xG
+    """
+    render_shot_map(compute_plot_data(shots_df, raster, figures=('shot_map',)), output_file)
+
+def _init_render_worker():
+    # Worker processes have no display; force the headless backend there only
+    matplotlib.use('Agg')
+
+def _render_figure(name, data, output_file):
+    FIGURE_RENDERERS[name](data, output_file)
+    return output_file
+
+def render_all_figures(shots_df, output_prefix="shot_analysis", shot_map_file='shot_map.png',
+                       figures=tuple(FIGURE_RENDERERS), workers=None, raster=None):
+    """
+    一次计算共用的分格聚合, 然后在进程池中并行绘制互不依赖的图
+
+    workers=None 时每张图一个进程; workers=1 在当前进程中依次绘制 (沿用调用方的绘图后端).
+    返回生成的文件列表.
+    """
+    data = compute_plot_data(shots_df, raster, figures)
+    outputs = {name: shot_map_file if name == 'shot_map' else f"{output_prefix}_{name}.png" for name in figures}
+    
+    if workers is None:
+        workers = min(len(figures), os.cpu_count() or 1)
+    if workers <= 1:
+        return [_render_figure(name, data, outputs[name]) for name in figures]
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker) as executor:
+        futures = [executor.submit(_render_figure, name, data, outputs[name]) for name in figures]
+        return [future.result() for future in futures]
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Rollup level -> shot column holding its key
+ROLLUP_LEVELS = {'player': 'player', 'team': 'team', 'match': 'match_id', 'season': 'season'}
+ROLLUP_STATS = ('shots', 'goals', 'xg_sum', 'npxg_sum', 'minutes', 'matches')
+# Per-(key, match) rows kept so a re-imported match replaces its earlier contribution
+CONTRIBUTION_FIELDS = ('code', 'match_id', 'shots', 'goals', 'xg_sum', 'npxg_sum', 'minutes')
+STATE_FILE = 'rollups_state.npz'
+
+def empty_rollups(levels=tuple(ROLLUP_LEVELS)):
+    """
+    空的汇总状态: 每个级别一个键数组 (数组下标即整数编码) 和按编码存放的统计数组
+    
+    另外保存每个 (键, 比赛) 的贡献, 统计数组由贡献汇总而来, 重新导入的比赛可以整场替换.
+    """
+    rollups = {'levels': {}, 'match_ids': np.empty(0, dtype=np.int64)}
+    for level in levels:
+        rollups['levels'][level] = {
+            'keys': np.empty(0, dtype=np.int64 if level == 'match' else np.str_),
+            'shots': np.zeros(0, dtype=np.int64),
+            'goals': np.zeros(0, dtype=np.int64),
+            'xg_sum': np.zeros(0, dtype=np.float64),
+            'npxg_sum': np.zeros(0, dtype=np.float64),
+            'minutes': np.zeros(0, dtype=np.float64),
+            'matches': np.zeros(0, dtype=np.int64),
+            'contributions': _empty_contributions()
+        }
+    return rollups
+
+def _empty_contributions():
+    return {
+        name: np.empty(0, dtype=np.float64 if name in ('xg_sum', 'npxg_sum', 'minutes') else np.int64)
+        for name in CONTRIBUTION_FIELDS
+    }
+
+def _season_keys(shots_df):
+    if 'competition_id' not in shots_df or 'season_id' not in shots_df:
+        return None
+    # build the 'competition/season' strings once per distinct pair, not per shot
+    competition_codes, competitions = pd.factorize(shots_df['competition_id'])
+    season_codes, seasons = pd.factorize(shots_df['season_id'])
+    codes, pairs = pd.factorize(competition_codes * len(seasons) + season_codes)
+    labels = np.array([f"{competitions[pair // len(seasons)]}/{seasons[pair % len(seasons)]}" for pair in pairs], dtype=object)
+    return labels[codes]
+
+def _encode(state, values):
+    """
+    把一批键映射到已有编码, 新出现的键追加到键数组末尾并扩展统计数组
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques).astype(state['keys'].dtype.type)
+    mapping = pd.Index(state['keys']).get_indexer(uniques)
+    new = mapping < 0
+    if new.any():
+        mapping[new] = len(state['keys']) + np.arange(new.sum())
+        state['keys'] = np.concatenate([state['keys'], uniques[new]])
+        for name in ROLLUP_STATS:
+            state[name] = np.concatenate([state[name], np.zeros(new.sum(), dtype=state[name].dtype)])
+    return np.where(codes >= 0, mapping[codes], -1)
+
+def _level_keys(level, df):
+    """
+    某个级别在射门表或出场时间表中的键, 缺少所需列时返回None
+    """
+    if level == 'season':
+        keys = _season_keys(df)
+    else:
+        keys = df[ROLLUP_LEVELS[level]].to_numpy() if ROLLUP_LEVELS[level] in df else None
+    if keys is not None and keys.dtype.kind in 'OU':
+        # unnamed players / teams are stored as '' and left out of the rollups
+        keys = pd.Series(keys).mask(keys == '').to_numpy()
+    return keys
+
+def _known_matches(df, rows):
+    match_ids = df['match_id'].to_numpy().astype(np.int64)
+    unknown = match_ids < 0
+    if unknown.any():
+        print(f"Warning: skipped {unknown.sum()} {rows} without a match id; name event files by their match id")
+        df, match_ids = df[~unknown], match_ids[~unknown]
+    return df, match_ids
+
+def add_shots_to_rollups(rollups, shots_df, minutes=None):
+    """
+    把一批比赛的射门和出场时间计入球员/球队/比赛/赛季汇总 (np.bincount, 无groupby)
+    
+    已经计入过的比赛会被整场替换 (先去掉旧的贡献), 重复导入不会重复计数, 修正后的比赛也能更新.
+    match_id 为 -1 (无法识别比赛) 的行无法按比赛替换, 被跳过.
+    minutes 为出场时间表 (data_funtion.APPEARANCE_COLUMNS: match_id, team, player, minutes, 可带
+    competition_id/season_id): 球员按自己的出场时间计, 没有射门的出场也计入场次和分钟;
+    球队, 比赛和赛季按比赛时长 (该场最长出场时间) 计. 没有出场时间的 (键, 比赛) 分钟数为NaN,
+    其 xg_per_90 也为NaN, 不再按有射门的比赛近似.
+    """
+    shots_df, match_ids = _known_matches(shots_df, 'shots')
+    if minutes is not None:
+        minutes, appearance_ids = _known_matches(minutes, 'appearances')
+    else:
+        appearance_ids = np.empty(0, dtype=np.int64)
+    batch_matches = np.union1d(match_ids, appearance_ids)
+    if len(batch_matches) == 0:
+        return rollups
+    rollups['match_ids'] = np.union1d(rollups['match_ids'], batch_matches)
+    
+    goals = shots_df['is_goal'].to_numpy().astype(np.float64)
+    xg = shots_df['predicted_xg'].to_numpy().astype(np.float64) if 'predicted_xg' in shots_df else np.zeros(len(shots_df))
+    penalty = shots_df['shot_type'].to_numpy() == 'Penalty' if 'shot_type' in shots_df else np.zeros(len(shots_df), dtype=bool)
+    match_codes = np.searchsorted(batch_matches, match_ids)
+    appearance_codes = np.searchsorted(batch_matches, appearance_ids)
+    if minutes is not None:
+        played = minutes['minutes'].to_numpy().astype(np.float64)
+        match_length = np.zeros(len(batch_matches))
+        np.maximum.at(match_length, appearance_codes, played)
+    
+    for level, state in rollups['levels'].items():
+        keys = _level_keys(level, shots_df)
+        if keys is None:
+            required = 'competition_id/season_id columns' if level == 'season' else f"{ROLLUP_LEVELS[level]} column"
+            print(f"Warning: shots have no {required}; the {level} rollup was not updated for this batch")
+            continue
+        codes = _encode(state, keys)
+        valid = codes >= 0
+        shot_pairs = codes[valid] * len(batch_matches) + match_codes[valid]
+    
+        appearance_pairs, appearance_minutes = np.empty(0, dtype=np.int64), np.empty(0)
+        appearance_keys = _level_keys(level, minutes) if minutes is not None else None
+        if appearance_keys is not None:
+            appearance = _encode(state, appearance_keys)
+            known = appearance >= 0
+            appearance_pairs = appearance[known] * len(batch_matches) + appearance_codes[known]
+            if level == 'player':
+                appearance_minutes = played[known]
+            else:
+                # a team / match / season appears once per match, for the length of the match
+                appearance_pairs, first = np.unique(appearance_pairs, return_index=True)
+                appearance_minutes = match_length[appearance_codes[known][first]]
+    
+        # one contribution row per distinct (key, match) with a shot or an appearance
+        rows, pairs = pd.factorize(np.concatenate([shot_pairs, appearance_pairs]))
+        shot_rows, appearance_rows = rows[:len(shot_pairs)], rows[len(shot_pairs):]
+        pair_codes, pair_matches = pairs // len(batch_matches), batch_matches[pairs % len(batch_matches)]
+        has_minutes = np.bincount(appearance_rows, minlength=len(pairs)) > 0
+        batch = {
+            'code': pair_codes,
+            'match_id': pair_matches,
+            'shots': np.bincount(shot_rows, minlength=len(pairs)),
+            'goals': np.bincount(shot_rows, weights=goals[valid], minlength=len(pairs)).astype(np.int64),
+            'xg_sum': np.bincount(shot_rows, weights=xg[valid], minlength=len(pairs)),
+            'npxg_sum': np.bincount(shot_rows, weights=np.where(penalty, 0, xg)[valid], minlength=len(pairs)),
+            'minutes': np.where(has_minutes, np.bincount(appearance_rows, weights=appearance_minutes, minlength=len(pairs)), np.nan)
+        }
+        stored = state['contributions']
+        keep = ~np.isin(stored['match_id'], batch_matches)
+        stored = {name: np.concatenate([stored[name][keep], batch[name]]) for name in CONTRIBUTION_FIELDS}
+        state['contributions'] = stored
+    
+        # totals are recomputed from the contributions, so replaced matches drop out
+        n = len(state['keys'])
+        for name in ('shots', 'goals', 'xg_sum', 'npxg_sum', 'minutes'):
+            state[name] = np.bincount(stored['code'], weights=stored[name], minlength=n).astype(state[name].dtype)
+        state['matches'] = np.bincount(stored['code'], minlength=n)
+    return rollups
+
+def build_rollups(shots_df, minutes=None, levels=tuple(ROLLUP_LEVELS)):
+    """
+    从射门表一次性生成汇总
+    """
+    return add_shots_to_rollups(empty_rollups(levels), shots_df, minutes)
+
+def rollup_table(rollups, level, min_shots=0, sort_by='xg_sum'):
+    """
+    查询某个级别的汇总表, 包括每90分钟xG和进球-xG
+
+    出场时间未知 (汇总时未传入出场时间表) 的键 minutes 和 xg_per_90 为NaN.
+    """
+    state = rollups['levels'][level]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xg_per_90 = np.where(state['minutes'] > 0, state['xg_sum'] * 90 / state['minutes'], np.nan)
+    table = pd.DataFrame({
+        level: state['keys'],
+        'shots': state['shots'],
+        'goals': state['goals'],
+        'xg': state['xg_sum'],
+        'npxg': state['npxg_sum'],
+        'goals_minus_xg': state['goals'] - state['xg_sum'],
+        'matches': state['matches'],
+        'minutes': state['minutes'],
+        'xg_per_90': xg_per_90
+    })
+    # keys left without any match after their matches were replaced are dropped
+    table = table[(state['matches'] > 0) & (table['shots'] >= min_shots)]
+    sort_by = {'xg_sum': 'xg', 'npxg_sum': 'npxg'}.get(sort_by, sort_by)
+    return table.sort_values(sort_by, ascending=False, kind='stable').reset_index(drop=True)
+
+def load_rollups(folder_path):
+    """
+    读取已保存的汇总状态, 不存在时返回None
+    """
+    state_path = Path(folder_path) / STATE_FILE
+    if not state_path.exists():
+        return None
+    with np.load(state_path) as state:
+        rollups = {'levels': {}, 'match_ids': state['match_ids']}
+        for level in state['levels']:
+            if f"{level}_contrib_code" not in state:
+                raise ValueError(f"{state_path} has no per-match contributions; rebuild it with build_rollups")
+            rollups['levels'][str(level)] = {
+                name: state[f"{level}_{name}"] for name in ('keys',) + ROLLUP_STATS
+            }
+            rollups['levels'][str(level)]['contributions'] = {
+                name: state[f"{level}_contrib_{name}"] for name in CONTRIBUTION_FIELDS
+            }
+    return rollups
+
+def save_rollups(rollups, folder_path):
+    """
+    保存汇总状态 (npz, 键、统计数组和每场比赛的贡献)
+    """
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+    state = {'levels': np.array(list(rollups['levels']), dtype=np.str_), 'match_ids': rollups['match_ids']}
+    for level, arrays in rollups['levels'].items():
+        for name, values in arrays.items():
+            if name != 'contributions':
+                state[f"{level}_{name}"] = values
+        for name, values in arrays['contributions'].items():
+            state[f"{level}_contrib_{name}"] = values
+    np.savez(folder_path / STATE_FILE, **state)
+
+def update_rollup_store(shots_df, folder_path, minutes=None, levels=tuple(ROLLUP_LEVELS)):
+    """
+    增量更新磁盘上的汇总: 计入新比赛, 替换已重新导入的比赛
+    """
+    rollups = load_rollups(folder_path)
+    if rollups is None or sorted(rollups['levels']) != sorted(levels):
+        rollups = empty_rollups(levels)
+    add_shots_to_rollups(rollups, shots_df, minutes)
+    save_rollups(rollups, folder_path)
+    print(f"Shot rollups written to {folder_path} ({len(rollups['match_ids'])} matches)")
+    return rollups
@@ -0,0 +1,109 @@
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pathlib import Path
+
+PARTITION_COLUMNS = ['competition_id', 'season_id']
+STORE_SCHEMA = pa.schema([
+    ('x', pa.float32()),
+    ('y', pa.float32()),
+    ('distance_to_goal', pa.float32()),
+    ('shot_angle', pa.float32()),
+    ('is_goal', pa.int8()),
+    ('match_id', pa.int32()),
+    ('team', pa.dictionary(pa.int32(), pa.string())),
+    ('player', pa.dictionary(pa.int32(), pa.string())),
+    ('minute', pa.int16()),
+    ('body_part', pa.dictionary(pa.int32(), pa.string())),
+    ('technique', pa.dictionary(pa.int32(), pa.string())),
+    ('shot_type', pa.dictionary(pa.int32(), pa.string())),
+    ('play_pattern', pa.dictionary(pa.int32(), pa.string())),
+    ('under_pressure', pa.int8()),
+    ('first_time', pa.int8()),
+    ('defenders_in_cone', pa.int16()),
+    ('keeper_distance', pa.float32()),
+    ('competition_id', pa.int16()),
+    ('season_id', pa.int16())
+])
+
+def load_match_index(matches_dir):
+    """
+    读取 open-data/data/matches/<competition>/<season>.json, 返回 match_id -> (competition_id, season_id)
+    """
+    index = {}
+    for file in sorted(Path(matches_dir).glob('*/*.json')):
+        with open(file, 'r', encoding='utf-8') as f:
+            matches = json.load(f)
+        for match in matches:
+            index[match['match_id']] = (
+                match.get('competition', {}).get('competition_id', int(file.parent.name)),
+                match.get('season', {}).get('season_id', int(file.stem))
+            )
+    return index
+
+def _with_partitions(shots_df, match_index):
+    shots_df = shots_df.copy()
+    match_ids = shots_df['match_id'].to_numpy()
+    competition_id = np.full(len(shots_df), -1, dtype=np.int16)
+    season_id = np.full(len(shots_df), -1, dtype=np.int16)
+    if match_index:
+        unique_ids, inverse = np.unique(match_ids, return_inverse=True)
+        lookup = np.array([match_index.get(int(match_id), (-1, -1)) for match_id in unique_ids], dtype=np.int16).reshape(-1, 2)
+        competition_id, season_id = lookup[inverse, 0], lookup[inverse, 1]
+    shots_df['competition_id'] = competition_id
+    shots_df['season_id'] = season_id
+    return shots_df
+
+def write_shot_store(shots_df, store_path, matches_dir=None, match_index=None):
+    """
+    将射门表写入按 competition_id/season_id 分区的Parquet数据集
+
+    坐标和几何特征存为float32, 进球标记为int8, 球队和球员使用字典编码.
+    没有比赛信息时分区值为-1. 已存在的同名分区会被覆盖.
+    """
+    if match_index is None and matches_dir is not None and Path(matches_dir).exists():
+        match_index = load_match_index(matches_dir)
+    
+    shots_df = _with_partitions(shots_df, match_index)
+    table = pa.Table.from_pandas(shots_df[STORE_SCHEMA.names], schema=STORE_SCHEMA, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=str(store_path),
+        partition_cols=PARTITION_COLUMNS,
+        existing_data_behavior='delete_matching'
+    )
+    print(f"Shot store written to {store_path} ({table.num_rows} shots)")
+
+def _store_dataset(store_path):
+    return ds.dataset(
+        str(store_path),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(name, STORE_SCHEMA.field(name).type) for name in PARTITION_COLUMNS]), flavor='hive')
+    )
+
+def _store_filter(competitions=None, seasons=None):
+    expression = None
+    for name, values in (('competition_id', competitions), ('season_id', seasons)):
+        if values is None:
+            continue
+        condition = ds.field(name).isin(list(values))
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def read_shot_store(store_path, columns=None, competitions=None, seasons=None):
+    """
+    从Parquet射门库读取数据, 可只加载指定的列和比赛/赛季分区
+    """
+    table = _store_dataset(store_path).to_table(columns=columns, filter=_store_filter(competitions, seasons))
+    return table.to_pandas()
+
+def iter_shot_store(store_path, columns=None, competitions=None, seasons=None, batch_size=1 << 18):
+    """
+    分块读取射门库, 每块返回一个DataFrame, 内存占用由 batch_size 决定
+    """
+    dataset = _store_dataset(store_path)
+    for batch in dataset.to_batches(columns=columns, filter=_store_filter(competitions, seasons), batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
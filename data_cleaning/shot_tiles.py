@@ -0,0 +1,170 @@
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+# Bin sizes in yards, coarsest first; each one is a zoom level for the front end
+TILE_BIN_SIZES = (10, 5, 2, 1)
+STATE_FILE = 'tiles_state.npz'
+MANIFEST_FILE = 'tiles.json'
+TILE_STATS = ('shots', 'goals', 'xg_sum')
+
+def _grid_shape(bin_size):
+    return int(np.ceil(PITCH_WIDTH / bin_size)), int(np.ceil(PITCH_LENGTH / bin_size))
+
+def _cell_index(x, y, bin_size):
+    """
+    射门位置对应的网格下标 (行优先: y行, x列), 超出球场的坐标归入边缘格子
+    """
+    ny, nx = _grid_shape(bin_size)
+    col = np.clip((np.asarray(x, dtype=np.float64) // bin_size).astype(np.intp), 0, nx - 1)
+    row = np.clip((np.asarray(y, dtype=np.float64) // bin_size).astype(np.intp), 0, ny - 1)
+    return row * nx + col
+
+def _empty_contributions():
+    return {
+        'match_id': np.empty(0, dtype=np.int64),
+        'cell': np.empty(0, dtype=np.int64),
+        'shots': np.empty(0, dtype=np.int64),
+        'goals': np.empty(0, dtype=np.int64),
+        'xg_sum': np.empty(0, dtype=np.float64)
+    }
+
+def empty_tiles(bin_sizes=TILE_BIN_SIZES):
+    """
+    空的多分辨率聚合: 每个级别保存射门数, 进球数和xG总和
+
+    另外按 (比赛, 格子) 保存每场比赛的稀疏贡献, 以便修正过的比赛可以整场替换.
+    """
+    levels, contributions = {}, {}
+    for bin_size in bin_sizes:
+        ny, nx = _grid_shape(bin_size)
+        levels[bin_size] = {
+            'shots': np.zeros(ny * nx, dtype=np.int64),
+            'goals': np.zeros(ny * nx, dtype=np.int64),
+            'xg_sum': np.zeros(ny * nx, dtype=np.float64)
+        }
+        contributions[bin_size] = _empty_contributions()
+    return {'levels': levels, 'contributions': contributions, 'match_ids': np.empty(0, dtype=np.int64)}
+
+def _known_matches(shots_df):
+    """
+    取出射门的比赛ID; 无法识别比赛的射门 (match_id 为 -1, 如事件文件名不是比赛ID) 无法按比赛替换, 被跳过
+    """
+    if 'match_id' not in shots_df:
+        raise ValueError("Shots need a match_id column to be aggregated per match")
+    match_ids = shots_df['match_id'].to_numpy().astype(np.int64)
+    unknown = match_ids < 0
+    if unknown.any():
+        print(f"Warning: skipped {unknown.sum()} shots without a match id; name event files by their match id")
+        shots_df, match_ids = shots_df[~unknown], match_ids[~unknown]
+    return shots_df, match_ids
+
+def add_shots_to_tiles(tiles, shots_df):
+    """
+    把一批比赛的射门计入各级网格 (np.bincount, 无逐行循环)
+
+    已经计入过的比赛会被整场替换 (先去掉旧的贡献), 因此重复导入不会重复计数,
+    修正后的比赛文件重新提取后也能更新聚合.
+    """
+    shots_df, match_ids = _known_matches(shots_df)
+    if len(shots_df) == 0:
+        return tiles
+    
+    x = shots_df['x'].to_numpy()
+    y = shots_df['y'].to_numpy()
+    goals = shots_df['is_goal'].to_numpy().astype(np.float64)
+    xg = shots_df['predicted_xg'].to_numpy().astype(np.float64) if 'predicted_xg' in shots_df else np.zeros(len(shots_df))
+    match_codes, batch_matches = pd.factorize(match_ids)
+    
+    for bin_size, level in tiles['levels'].items():
+        n_cells = len(level['shots'])
+        # one row per (match, cell) the batch touches
+        pair_codes, pairs = pd.factorize(match_codes * n_cells + _cell_index(x, y, bin_size))
+        batch = {
+            'match_id': batch_matches[pairs // n_cells],
+            'cell': pairs % n_cells,
+            'shots': np.bincount(pair_codes, minlength=len(pairs)),
+            'goals': np.bincount(pair_codes, weights=goals, minlength=len(pairs)).astype(np.int64),
+            'xg_sum': np.bincount(pair_codes, weights=xg, minlength=len(pairs))
+        }
+        stored = tiles['contributions'][bin_size]
+        keep = ~np.isin(stored['match_id'], batch_matches)
+        stored = {name: np.concatenate([values[keep], batch[name]]) for name, values in stored.items()}
+        tiles['contributions'][bin_size] = stored
+        for name in TILE_STATS:
+            totals = np.bincount(stored['cell'], weights=stored[name], minlength=n_cells)
+            level[name] = totals.astype(level[name].dtype)
+        tiles['match_ids'] = np.unique(stored['match_id'])
+    return tiles
+
+def build_tiles(shots_df, bin_sizes=TILE_BIN_SIZES):
+    """
+    从射门表一次性生成多分辨率聚合
+    """
+    return add_shots_to_tiles(empty_tiles(bin_sizes), shots_df)
+
+def load_tiles(folder_path):
+    """
+    读取已保存的聚合状态, 不存在时返回None
+    """
+    state_path = Path(folder_path) / STATE_FILE
+    if not state_path.exists():
+        return None
+    with np.load(state_path) as state:
+        if f"contrib_match_id_{state['bin_sizes'][0]}" not in state:
+            raise ValueError(f"{state_path} has no per-match contributions; rebuild it with build_tiles")
+        tiles = {'levels': {}, 'contributions': {}, 'match_ids': state['match_ids']}
+        for bin_size in state['bin_sizes']:
+            tiles['levels'][int(bin_size)] = {name: state[f"{name}_{bin_size}"] for name in TILE_STATS}
+            tiles['contributions'][int(bin_size)] = {
+                name: state[f"contrib_{name}_{bin_size}"] for name in _empty_contributions()
+            }
+    return tiles
+
+def save_tiles(tiles, folder_path):
+    """
+    保存聚合: 每个级别一个JSON (供前端按缩放级别加载), 以及用于增量更新的npz状态
+    """
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+    
+    manifest = {'pitch': [PITCH_LENGTH, PITCH_WIDTH], 'levels': []}
+    state = {'bin_sizes': np.array(sorted(tiles['levels']), dtype=np.int64), 'match_ids': tiles['match_ids']}
+    for bin_size, level in sorted(tiles['levels'].items(), reverse=True):
+        ny, nx = _grid_shape(bin_size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_xg = np.where(level['shots'] > 0, level['xg_sum'] / level['shots'], 0.0)
+        file_name = f"tiles_{bin_size}.json"
+        with open(folder_path / file_name, 'w', encoding='utf-8') as f:
+            json.dump({
+                'bin_size': bin_size,
+                'nx': nx,
+                'ny': ny,
+                'shots': level['shots'].tolist(),
+                'goals': level['goals'].tolist(),
+                'mean_xg': np.round(mean_xg, 4).tolist()
+            }, f, separators=(',', ':'))
+        manifest['levels'].append({'bin_size': bin_size, 'nx': nx, 'ny': ny, 'file': file_name})
+        for name, values in level.items():
+            state[f"{name}_{bin_size}"] = values
+        for name, values in tiles['contributions'][bin_size].items():
+            state[f"contrib_{name}_{bin_size}"] = values
+    
+    np.savez(folder_path / STATE_FILE, **state)
+    with open(folder_path / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+def update_tile_store(shots_df, folder_path, bin_sizes=TILE_BIN_SIZES):
+    """
+    增量更新磁盘上的聚合: 计入新比赛, 替换已有比赛的旧贡献, 然后重写各级别文件
+    """
+    tiles = load_tiles(folder_path)
+    if tiles is None or sorted(tiles['levels']) != sorted(bin_sizes):
+        tiles = empty_tiles(bin_sizes)
+    add_shots_to_tiles(tiles, shots_df)
+    save_tiles(tiles, folder_path)
+    print(f"Shot tiles written to {folder_path} ({len(tiles['match_ids'])} matches)")
+    return tiles
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTML_CACHE_DIR = 'html_cache'
+INDEX_FILE = 'index.json'
+# FBref asks scrapers to stay under 10 requests per minute
+MIN_REQUEST_INTERVAL = 6.0
+USER_AGENT = 'Mozilla/5.0 (compatible; xg-research-scraper)'
+
+def make_session(pool_size=8, retries=3, backoff=1.0):
+    """
+    共享的连接池会话: keep-alive复用连接, 对429/5xx按退避时间自动重试 (遵守Retry-After)
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+class RateLimiter:
+    """
+    线程安全的限速器: 相邻两次请求的开始时间至少间隔 min_interval 秒
+    """
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+class HTMLCache:
+    """
+    按内容寻址的HTML缓存: 页面以内容的SHA-256命名 (gzip压缩), index.json 记录 URL -> 摘要
+    
+    相同内容的页面只存一份; 索引写入是原子的, 可在多个线程间共享.
+    """
+    def __init__(self, cache_dir=HTML_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        index_path = self.cache_dir / INDEX_FILE
+        self.index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+    
+    def _object_path(self, digest):
+        return self.objects_dir / f"{digest}.html.gz"
+    
+    def get(self, url):
+        digest = self.index.get(url)
+        if digest is None or not self._object_path(digest).exists():
+            return None
+        with gzip.open(self._object_path(digest), 'rt', encoding='utf-8') as f:
+            return f.read()
+    
+    def put(self, url, html):
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self.lock:
+            self.index[url] = digest
+            tmp_path = self.cache_dir / f"{INDEX_FILE}.tmp"
+            tmp_path.write_text(json.dumps(self.index, indent=1), encoding='utf-8')
+            os.replace(tmp_path, self.cache_dir / INDEX_FILE)
+        return digest
+
+def fetch_page(url, session, cache=None, limiter=None, refresh=False, timeout=30):
+    """
+    获取一个页面: 优先读缓存, 否则限速后通过共享会话下载并写入缓存
+    """
+    if cache is not None and not refresh:
+        html = cache.get(url)
+        if html is not None:
+            return html
+    if limiter is not None:
+        limiter.wait()
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    if cache is not None:
+        cache.put(url, response.text)
+    return response.text
+
+def fetch_pages(urls, cache_dir=HTML_CACHE_DIR, workers=4, min_interval=MIN_REQUEST_INTERVAL, refresh=False,
+                session=None):
+    """
+    并发获取一组比赛页面, 返回 URL -> HTML 的字典 (顺序与 urls 相同, 失败的页面为None)
+    
+    所有线程共用一个连接池会话和一个限速器; 已缓存的页面不发请求, 也不占用限速.
+    """
+    urls = list(dict.fromkeys(urls))
+    session = session or make_session(pool_size=workers)
+    cache = HTMLCache(cache_dir) if cache_dir else None
+    limiter = RateLimiter(min_interval)
+    
+    def fetch(url):
+        try:
+            return fetch_page(url, session, cache, limiter, refresh)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = dict(zip(urls, executor.map(fetch, urls)))
+    
+    fetched = sum(page is not None for page in pages.values())
+    print(f"Fetched {fetched}/{len(urls)} pages")
+    return pages
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Fetch FBref match pages into the local HTML cache')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--cache-dir', default=HTML_CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--min-interval', type=float, default=MIN_REQUEST_INTERVAL)
+    parser.add_argument('--refresh', action='store_true')
+    args = parser.parse_args()
+    fetch_pages(args.urls, args.cache_dir, args.workers, args.min_interval, args.refresh)
@@ -0,0 +1,151 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+import lxml.etree
+import lxml.html
+import numpy as np
+import pandas as pd
+
+SHOTS_TABLE_ID = 'shots_all'
+# stats_<team id>_summary, stats_<team id>_passing_types
+TEAM_TABLE_PATTERN = re.compile(r'^stats_([0-9a-f]{8})_(summary|passing_types)$')
+SQUAD_LINK_PATTERN = re.compile(r'/squads/([0-9a-f]{8})/')
+# stoppage-time minutes such as '90+2'
+ADDED_TIME_PATTERN = re.compile(r'^(\d+)\+(\d+)$')
+
+def _cell_text(cell):
+    # flag icons render as a country code ('ar') in front of the name
+    for flag in cell.xpath('.//span[contains(@class, "f-i")]'):
+        flag.drop_tree()
+    return cell.text_content().strip()
+
+def _table_elements(root):
+    """
+    按id收集页面中的所有表格, 包括FBref放在HTML注释里延迟渲染的表格
+    """
+    tables = {table.get('id'): table for table in root.iter('table') if table.get('id')}
+    for comment in root.iter(lxml.etree.Comment):
+        if '<table' in (comment.text or ''):
+            for table in lxml.html.fromstring(f"<div>{comment.text}</div>").iter('table'):
+                tables.setdefault(table.get('id'), table)
+    return tables
+
+def _headers(table):
+    """
+    取最后一行表头作为列名; 重名的列 (如两个 'Att') 加上上层分组表头作前缀
+    """
+    header_rows = table.xpath('./thead/tr')
+    names = [_cell_text(cell) for cell in header_rows[-1].xpath('./th|./td')]
+    groups = [''] * len(names)
+    if len(header_rows) > 1:
+        position = 0
+        for cell in header_rows[0].xpath('./th|./td'):
+            span = int(cell.get('colspan', 1))
+            groups[position:position + span] = [_cell_text(cell)] * span
+            position += span
+    
+    counts = pd.Series(names).value_counts()
+    names = [f"{group} {name}" if counts[name] > 1 and group else name for name, group in zip(names, groups)]
+    seen = {}
+    for i, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[i] = f"{name}_{seen[name]}"
+    return names
+
+def _number(text):
+    added_time = ADDED_TIME_PATTERN.match(text)
+    if added_time:
+        return int(added_time.group(1)) + int(added_time.group(2))
+    text = text.replace(',', '').rstrip('%')
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def _typed_column(values):
+    """
+    全部非空值都能解析为数字的列转为数值数组; '90+2' 形式的比赛分钟转为 92, 其余保留为字符串
+    """
+    try:
+        numbers = [_number(value) if value else None for value in values]
+    except ValueError:
+        return np.array([value if value else None for value in values], dtype=object)
+    if all(number is None for number in numbers):
+        return np.array(numbers, dtype=object)
+    if all(isinstance(number, int) for number in numbers):
+        return np.array(numbers, dtype=np.int64)
+    return np.array([np.nan if number is None else number for number in numbers], dtype=np.float64)
+
+def table_frame(table):
+    """
+    把一个FBref表格转为带类型的DataFrame; 跳过tbody中重复的表头行和空白分隔行
+    """
+    columns = _headers(table)
+    rows = []
+    for row in table.xpath('./tbody/tr'):
+        classes = row.get('class') or ''
+        if 'thead' in classes or 'spacer' in classes or 'over_header' in classes:
+            continue
+        cells = [_cell_text(cell) for cell in row.xpath('./th|./td')]
+        if not any(cells):
+            continue
+        rows.append((cells + [''] * len(columns))[:len(columns)])
+    data = list(zip(*rows)) if rows else [[] for _ in columns]
+    return pd.DataFrame({name: _typed_column(list(values)) for name, values in zip(columns, data)})
+
+def _team_names(root):
+    """
+    从比分栏的球队链接中读取 球队id -> 球队名
+    """
+    names = {}
+    for link in root.xpath('//div[contains(@class, "scorebox")]//strong/a[contains(@href, "/squads/")]'):
+        match = SQUAD_LINK_PATTERN.search(link.get('href'))
+        if match:
+            names.setdefault(match.group(1), link.text_content().strip())
+    return names
+
+def extract_match_tables(html):
+    """
+    只解析一次页面, 按表格id一次取出射门表, 各队球员汇总表和传球类型表
+    
+    返回 {'shots': DataFrame 或 None, 'summary': {球队: DataFrame}, 'passing_types': {球队: DataFrame}}.
+    """
+    root = lxml.html.fromstring(html)
+    tables = _table_elements(root)
+    team_names = _team_names(root)
+    
+    result = {'shots': None, 'summary': {}, 'passing_types': {}}
+    if SHOTS_TABLE_ID in tables:
+        result['shots'] = table_frame(tables[SHOTS_TABLE_ID])
+    for table_id, table in tables.items():
+        match = TEAM_TABLE_PATTERN.match(table_id or '')
+        if match:
+            team_id, kind = match.groups()
+            result[kind][team_names.get(team_id, team_id)] = table_frame(table)
+    return result
+
+def _extract_page(item):
+    url, html = item
+    return url, extract_match_tables(html)
+
+def extract_pages(pages, workers=1):
+    """
+    从多个页面 (URL -> HTML, 如 fbref_fetch.fetch_pages 的结果) 提取表格并合并
+    
+    返回 shots, summary, passing_types 三个DataFrame, 带 match_url 和 team 列.
+    """
+    items = [(url, html) for url, html in pages.items() if html]
+    if workers > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            extracted = list(executor.map(_extract_page, items, chunksize=max(1, len(items) // (workers * 4))))
+    else:
+        extracted = [_extract_page(item) for item in items]
+    
+    frames = {'shots': [], 'summary': [], 'passing_types': []}
+    for url, tables in extracted:
+        if tables['shots'] is not None:
+            frames['shots'].append(tables['shots'].assign(match_url=url))
+        for kind in ('summary', 'passing_types'):
+            for team, frame in tables[kind].items():
+                frames[kind].append(frame.assign(match_url=url, team=team))
+    return {kind: pd.concat(parts, ignore_index=True) if parts else pd.DataFrame() for kind, parts in frames.items()}
@@ -1,76 +1,27 @@
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
-import statsmodels.api as sm
-
-# Load the datasets
-france_data_path = 'data_cleaning/web-scraping/france_player_stats_pt.csv'
-argentina_data_path = 'data_cleaning/web-scraping/argentina_player_stats_pt.csv'
-france_data = pd.read_csv(france_data_path)
-argentina_data = pd.read_csv(argentina_data_path)
-combined_data = pd.concat([france_data, argentina_data])
-
-# Data cleaning and preparation
-# Convert columns to numeric and drop rows with any NaN values in these columns
-numeric_columns = ['Min', 'Gls', 'Ast', 'PK', 'PKatt', 'SoT', 'Touches', 'Tkl', 'Int', 'Blocks', 'xG', 'npxG', 'xAG']
-combined_data[numeric_columns] = combined_data[numeric_columns].apply(pd.to_numeric, errors='coerce')
-combined_data.dropna(subset=numeric_columns, inplace=True)
-
-# Feature Selection
-# Choosing features that have shown some reasonable correlation or theoretical relevance
-features = ['Min', 'Gls', 'SoT', 'Touches', 'Tkl', 'Blocks']
-
-# Target variable
-target = 'xG'
-
-# Splitting data
-X = combined_data[features]
-y = combined_data[target]
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Model Building
-model = LinearRegression()
-model.fit(X_train, y_train)
-
-# Making predictions and evaluating the model
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-
-# Output the coefficients of the model
-coefficients = model.coef_
-intercept = model.intercept_
-
-print("Mean Squared Error:", mse)
-print("R^2 Score:", r2)
-print("Model Coefficients:", coefficients)
-print("Model Intercept:", intercept)
-
-# Function derived from the model
-print("\nDerived Function for xG:")
-print(f"xG = {intercept:.4f} + ", end="")
-print(" + ".join([f"{coeff:.4f}*{feat}" for coeff, feat in zip(coefficients, features)]))
-
-X = combined_data[features]
-X = sm.add_constant(X)  # adding a constant for the intercept
-
-# Model Building using GLM
-model = sm.GLM(y, X, family=sm.families.Gaussian())
-results = model.fit()
-
-# Print the summary of the regression
-print(results.summary())
-
-model_sklearn = LinearRegression()
-model_sklearn.fit(X, y)
-
-# Output the coefficients of the model
-coefficients_sklearn = model_sklearn.coef_
-intercept_sklearn = model_sklearn.intercept_
-
-print("Model Coefficients from sklearn:", coefficients_sklearn)
-print("Model Intercept from sklearn:", intercept_sklearn)
-
-#the information from 
\ No newline at end of file
+from pathlib import Path
+from player_regression import PLAYER_FEATURES, PLAYER_TARGET, fit_player_models, write_coefficient_table
+
+# Typed player summaries written by data_cleaning/csv_combing.py
+PLAYER_STATS_FILE = Path(__file__).resolve().parent.parent / 'scraped_tables' / 'summary.parquet'
+COEFFICIENTS_FILE = Path(__file__).resolve().parent / 'player_xg_coefficients.csv'
+
+def load_player_stats(path=PLAYER_STATS_FILE):
+    """
+    读取合并后的球员汇总表 (已去掉重复表头行和重复抓取的比赛, 列已有类型)
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found; run data_cleaning/csv_combing.py to consolidate the scraped CSVs")
+    return pd.read_parquet(path)
+
+if __name__ == "__main__":
+    combined_data = load_player_stats()
+    # OLS, Gaussian GLM, ridge/lasso and per-position fits on one shared design matrix
+    coefficients = fit_player_models(combined_data, PLAYER_FEATURES, PLAYER_TARGET)
+    write_coefficient_table(coefficients, COEFFICIENTS_FILE)
+    
+    # Function derived from the model
+    ols = coefficients[coefficients['spec'] == 'ols'].set_index('term')['coef']
+    print("\nDerived Function for xG:")
+    print(f"xG = {ols['const']:.4f} + " + " + ".join(f"{ols[name]:.4f}*{name}" for name in PLAYER_FEATURES))
@@ -0,0 +1,135 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from sklearn.linear_model import Lasso, Ridge
+
+PLAYER_FEATURES = ['Min', 'Gls', 'SoT', 'Touches', 'Tkl', 'Blocks']
+PLAYER_TARGET = 'xG'
+PENALTY_ALPHAS = (0.01, 0.1)
+GLM_FAMILIES = {'gaussian': sm.families.Gaussian, 'poisson': sm.families.Poisson}
+
+def design_matrix(df, features=PLAYER_FEATURES, target=PLAYER_TARGET):
+    """
+    一次性构造数值设计矩阵: 特征列和目标列统一转为数值, 去掉含缺失值的行和球队合计行
+    
+    返回 (X, y, positions), X 为C连续的float64矩阵, positions 为每名球员的主要位置.
+    """
+    columns = list(features) + [target]
+    numeric = df[columns].apply(pd.to_numeric, errors='coerce')
+    complete = numeric.notna().all(axis=1)
+    if 'Player' in df:
+        # a team-total footer ('17 Players', Min 1,320) sums the whole squad and would dominate the fit
+        complete &= ~df['Player'].fillna('').astype(str).str.fullmatch(r'\d+ Players')
+    complete = complete.to_numpy()
+    X = np.ascontiguousarray(numeric[features].to_numpy(dtype=np.float64, na_value=np.nan)[complete])
+    y = numeric[target].to_numpy(dtype=np.float64, na_value=np.nan)[complete]
+    if 'Pos' in df:
+        positions = df['Pos'].fillna('').astype(str).str.split(',').str[0].str.strip().to_numpy()[complete]
+    else:
+        positions = np.full(len(y), '', dtype=object)
+    return X, y, positions.astype(str)
+
+def default_specs(positions=(), alphas=PENALTY_ALPHAS):
+    """
+    默认模型规格: 全部球员上的OLS, 高斯GLM, 各正则化强度的ridge/lasso, 以及每个位置单独的OLS
+    """
+    specs = [{'name': 'ols', 'model': 'ols'}, {'name': 'glm_gaussian', 'model': 'glm', 'family': 'gaussian'}]
+    for alpha in alphas:
+        specs.append({'name': f"ridge_{alpha:g}", 'model': 'ridge', 'alpha': alpha})
+        specs.append({'name': f"lasso_{alpha:g}", 'model': 'lasso', 'alpha': alpha})
+    for position in sorted(set(positions) - {''}):
+        specs.append({'name': f"ols_{position}", 'model': 'ols', 'position': position})
+    return specs
+
+def _penalized_fit(spec, X, y):
+    # standardise so the penalty treats every feature alike, then map back to raw units
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    scale[scale == 0] = 1.0
+    estimator = (Ridge if spec['model'] == 'ridge' else Lasso)(alpha=spec['alpha'])
+    estimator.fit((X - mean) / scale, y)
+    coef = estimator.coef_ / scale
+    intercept = estimator.intercept_ - np.sum(coef * mean)
+    return np.r_[intercept, coef], np.full(len(coef) + 1, np.nan), np.full(len(coef) + 1, np.nan), np.nan
+
+def _fit_spec(folder, spec, features):
+    """
+    在一个进程中拟合一个模型规格; 设计矩阵以只读内存映射方式打开, 不在进程间复制
+    """
+    folder = Path(folder)
+    X = np.load(folder / 'X.npy', mmap_mode='r')
+    y = np.load(folder / 'y.npy', mmap_mode='r')
+    rows = slice(None)
+    if spec.get('position'):
+        rows = np.load(folder / 'positions.npy') == spec['position']
+    X, y = np.asarray(X[rows]), np.asarray(y[rows])
+    if len(y) <= X.shape[1] + 1:
+        return None
+    
+    if spec['model'] in ('ols', 'glm'):
+        X1 = sm.add_constant(X, has_constant='add')
+        if spec['model'] == 'ols':
+            results = sm.OLS(y, X1).fit()
+        else:
+            results = sm.GLM(y, X1, family=GLM_FAMILIES[spec.get('family', 'gaussian')]()).fit()
+        params, std_err, p_values, aic = results.params, results.bse, results.pvalues, results.aic
+        fitted = results.fittedvalues
+    else:
+        params, std_err, p_values, aic = _penalized_fit(spec, X, y)
+        fitted = params[0] + X @ params[1:]
+    
+    residual = y - fitted
+    r2 = 1 - np.sum(residual ** 2) / np.sum((y - y.mean()) ** 2)
+    return pd.DataFrame({
+        'spec': spec['name'],
+        'model': spec['model'],
+        'position': spec.get('position') or 'all',
+        'n': len(y),
+        'term': ['const'] + list(features),
+        'coef': params,
+        'std_err': std_err,
+        'p_value': p_values,
+        'r2': r2,
+        'rmse': np.sqrt(np.mean(residual ** 2)),
+        'aic': aic
+    })
+
+def fit_player_models(df, features=PLAYER_FEATURES, target=PLAYER_TARGET, specs=None, workers=None):
+    """
+    在同一个设计矩阵上并行拟合多个模型规格, 返回长格式的系数表 (每个规格每个变量一行)
+    
+    规格人数不足 (行数不多于参数个数) 时跳过.
+    """
+    X, y, positions = design_matrix(df, features, target)
+    specs = default_specs(positions) if specs is None else specs
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+    
+    with tempfile.TemporaryDirectory(prefix='player_regression_') as folder:
+        np.save(Path(folder) / 'X.npy', X)
+        np.save(Path(folder) / 'y.npy', y)
+        np.save(Path(folder) / 'positions.npy', positions)
+        if workers == 1:
+            tables = [_fit_spec(folder, spec, features) for spec in specs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                tables = list(executor.map(_fit_spec, [folder] * len(specs), specs, [features] * len(specs)))
+    
+    skipped = [spec['name'] for spec, table in zip(specs, tables) if table is None]
+    if skipped:
+        print(f"Skipped specs with too few players: {', '.join(skipped)}")
+    tables = [table for table in tables if table is not None]
+    if not tables:
+        raise ValueError("No model spec had enough players to fit")
+    return pd.concat(tables, ignore_index=True)
+
+def write_coefficient_table(coefficients, output_file='player_xg_coefficients.csv'):
+    """
+    写出系数表, 并为每个规格打印一行拟合优度
+    """
+    coefficients.to_csv(output_file, index=False, float_format='%.6g')
+    summary = coefficients.drop_duplicates('spec')[['spec', 'position', 'n', 'r2', 'rmse', 'aic']]
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    print(f"Coefficients written to {output_file}")
@@ -0,0 +1,154 @@
+import json
+import numpy as np
+import pandas as pd
+
+CALIBRATION_BINS = 10
+EVALUATION_GROUPS = ('competition_id', 'season_id', 'team')
+
+def calibration_table(y_true, y_prob, n_bins=CALIBRATION_BINS):
+    """
+    可靠性分箱: 每个等宽概率区间内的射门数, 平均预测xG和实际进球率
+    """
+    bins = np.minimum((y_prob * n_bins).astype(np.int64), n_bins - 1)
+    count = np.bincount(bins, minlength=n_bins)
+    predicted = np.bincount(bins, weights=y_prob, minlength=n_bins)
+    observed = np.bincount(bins, weights=y_true, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return count, predicted / count, observed / count
+
+def roc_auc(y_true, y_prob):
+    """
+    基于秩的ROC AUC (Mann-Whitney U), 并列的预测值取平均秩; O(n log n), 无需逐个阈值
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float('nan')
+    _, inverse, counts = np.unique(y_prob, return_inverse=True, return_counts=True)
+    # average 1-based rank of each distinct value
+    ranks = np.cumsum(counts) - (counts - 1) / 2
+    return float((ranks[inverse][y_true].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+def score_metrics(y_true, y_prob):
+    """
+    总体指标: log loss, Brier score, 期望校准误差 (按射门数加权的 |预测 - 实际| ), xG/进球比
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_prob = np.asarray(y_prob, dtype=np.float64)
+    p = np.clip(y_prob, 1e-15, 1 - 1e-15)
+    count, predicted, observed = calibration_table(y_true, y_prob)
+    filled = count > 0
+    return {
+        'log_loss': float(-np.mean(y_true * np.log(p) + (1 - y_true) * np.log(1 - p))),
+        'brier': float(np.mean((y_prob - y_true) ** 2)),
+        'calibration_error': float(np.sum(count[filled] * np.abs(predicted[filled] - observed[filled])) / len(y_true)),
+        'xg_ratio': float(y_prob.sum() / max(y_true.sum(), 1))
+    }
+
+def group_table(keys, y_true, y_prob):
+    """
+    按分组统计射门数, 进球, xG, 进球-xG 和 Brier score; factorize + bincount, 没有逐组循环
+    """
+    codes, labels = pd.factorize(np.asarray(keys), sort=True)
+    valid = codes >= 0
+    codes, y_true, y_prob = codes[valid], y_true[valid], y_prob[valid]
+    n = len(labels)
+    shots = np.bincount(codes, minlength=n)
+    goals = np.bincount(codes, weights=y_true, minlength=n)
+    xg = np.bincount(codes, weights=y_prob, minlength=n)
+    squared_error = np.bincount(codes, weights=(y_prob - y_true) ** 2, minlength=n)
+    table = pd.DataFrame({
+        'group': labels,
+        'shots': shots,
+        'goals': goals.astype(np.int64),
+        'xg': xg,
+        'goals_minus_xg': goals - xg,
+        'brier': squared_error / np.maximum(shots, 1)
+    })
+    return table.sort_values('shots', ascending=False, kind='stable').reset_index(drop=True)
+
+def evaluate_xg(shots_df, prediction_column='predicted_xg', groups=EVALUATION_GROUPS, n_bins=CALIBRATION_BINS):
+    """
+    评估预测xG: 总体指标, ROC AUC, 可靠性曲线以及按比赛/赛季/球队的xG与进球对比表
+    
+    只对 shots_df 中存在的分组列生成分组表.
+    """
+    y_true = shots_df['is_goal'].to_numpy(dtype=np.float64)
+    y_prob = shots_df[prediction_column].to_numpy(dtype=np.float64)
+    count, predicted, observed = calibration_table(y_true, y_prob, n_bins)
+    
+    return {
+        'shots': len(shots_df),
+        'goals': int(y_true.sum()),
+        'xg': float(y_prob.sum()),
+        **score_metrics(y_true, y_prob),
+        'roc_auc': roc_auc(y_true, y_prob),
+        'reliability': {
+            'bin_edges': np.linspace(0, 1, n_bins + 1).tolist(),
+            'shots': count.tolist(),
+            'mean_predicted': [None if np.isnan(v) else float(v) for v in predicted],
+            'goal_rate': [None if np.isnan(v) else float(v) for v in observed]
+        },
+        'groups': {
+            name: group_table(shots_df[name].to_numpy(), y_true, y_prob).to_dict(orient='list')
+            for name in groups if name in shots_df
+        }
+    }
+
+def render_evaluation(report, output_file='xg_calibration.png'):
+    """
+    绘制可靠性曲线和预测xG分布
+    """
+    # a bare Figure renders without pyplot, so the caller's backend is left alone
+    from matplotlib.figure import Figure
+    
+    reliability = report['reliability']
+    edges = np.asarray(reliability['bin_edges'])
+    centers = (edges[:-1] + edges[1:]) / 2
+    predicted = np.array([np.nan if v is None else v for v in reliability['mean_predicted']])
+    observed = np.array([np.nan if v is None else v for v in reliability['goal_rate']])
+    
+    fig = Figure(figsize=(7, 9))
+    curve, histogram = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]}, sharex=True)
+    curve.plot([0, 1], [0, 1], linestyle='--', color='gray', label='Perfect calibration')
+    curve.plot(predicted, observed, marker='o', color='red', label='xG model')
+    curve.set_ylabel('Observed goal rate')
+    curve.set_title(
+        f"Reliability ({report['shots']} shots): Brier {report['brier']:.4f}, "
+        f"log loss {report['log_loss']:.4f}, AUC {report['roc_auc']:.3f}"
+    )
+    curve.legend(loc='upper left')
+    curve.grid(True, alpha=0.3)
+    
+    histogram.bar(centers, reliability['shots'], width=np.diff(edges), color='steelblue', edgecolor='white')
+    histogram.set_yscale('log')
+    histogram.set_xlabel('Predicted xG')
+    histogram.set_ylabel('Shots')
+    
+    fig.tight_layout()
+    fig.savefig(output_file, dpi=150, bbox_inches='tight')
+
+def _json_value(value):
+    # NaN (e.g. ROC AUC with a single class) is not valid JSON; write null like the empty reliability bins
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def write_evaluation_report(report, json_file='xg_evaluation.json', figure_file='xg_calibration.png'):
+    """
+    写出紧凑的JSON报告和可靠性曲线图
+    """
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(_json_value(report), f, separators=(',', ':'), allow_nan=False)
+    if figure_file:
+        render_evaluation(report, figure_file)
+    
+    print(f"\nBrier score: {report['brier']:.4f}, log loss: {report['log_loss']:.4f}, ROC AUC: {report['roc_auc']:.3f}")
+    print(f"Total xG {report['xg']:.1f} vs {report['goals']} goals")
@@ -0,0 +1,118 @@
+import json
+import numpy as np
+from pathlib import Path
+from shot_geometry import GOAL_Y1, GOAL_Y2
+from xg_scorer import score_locations
+
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+LOCATION_FEATURES = {'x', 'y', 'distance_to_goal', 'shot_angle'}
+
+def build_xg_grid(artifact, resolution=0.1):
+    """
+    把只依赖射门位置的模型预先计算到球场网格上 (默认0.1码)
+
+    网格节点包含球场边界, values[i, j] 对应 (x = j * resolution, y = i * resolution).
+    门柱上角度无定义, 这两个节点取紧贴球门线一侧的值.
+    """
+    if not set(artifact['features']) <= LOCATION_FEATURES:
+        raise ValueError(f"xG grid needs a location-only model, got features {artifact['features']}")
+    
+    nx = int(round(PITCH_LENGTH / resolution)) + 1
+    ny = int(round(PITCH_WIDTH / resolution)) + 1
+    x = np.linspace(0, PITCH_LENGTH, nx)
+    y = np.linspace(0, PITCH_WIDTH, ny)
+    X, Y = np.meshgrid(x, y)
+    values = score_locations(artifact, X.ravel(), Y.ravel()).reshape(ny, nx)
+    
+    undefined = ~np.isfinite(values)
+    if undefined.any():
+        values[undefined] = score_locations(artifact, X[undefined] - 1e-6 * resolution, Y[undefined])
+    
+    return {
+        'resolution': float(resolution),
+        'nx': nx,
+        'ny': ny,
+        'model_version': artifact.get('model_version'),
+        'values': values.astype(np.float32)
+    }
+
+def lookup_xg(grid, x, y):
+    """
+    双线性插值查询xG, 坐标会被限制在球场范围内
+    """
+    values, resolution = grid['values'], grid['resolution']
+    fx = np.clip(np.asarray(x, dtype=np.float64), 0, PITCH_LENGTH) / resolution
+    fy = np.clip(np.asarray(y, dtype=np.float64), 0, PITCH_WIDTH) / resolution
+    ix = np.minimum(fx.astype(np.intp), grid['nx'] - 2)
+    iy = np.minimum(fy.astype(np.intp), grid['ny'] - 2)
+    tx, ty = fx - ix, fy - iy
+    
+    v00, v01 = values[iy, ix], values[iy, ix + 1]
+    v10, v11 = values[iy + 1, ix], values[iy + 1, ix + 1]
+    return (v00 * (1 - tx) + v01 * tx) * (1 - ty) + (v10 * (1 - tx) + v11 * tx) * ty
+
+def _post_distance(x, y):
+    return np.minimum(np.hypot(PITCH_LENGTH - x, GOAL_Y1 - y), np.hypot(PITCH_LENGTH - x, GOAL_Y2 - y))
+
+def grid_error_bound(grid, artifact, n_samples=200000, seed=0, post_radius=1.0):
+    """
+    评估网格插值相对精确打分的误差
+
+    - estimated_bound: 双线性插值误差上界 h^2/8 * (|f_xx| + |f_yy|), 二阶导用网格二阶差分估计
+      (不含门柱 post_radius 码以内的节点);
+    - max_error_cell_centers: 在格子中心 (双线性误差最大处) 的实测最大误差;
+    - max_error_random / mean_error_random: 随机位置的实测误差;
+    - max_error_away_from_posts: 距两根门柱超过 post_radius 码的随机位置的最大误差.
+    射门角度在门柱处不连续, 所以误差集中在门柱附近, 那里上界估计不成立;
+    其余位置的误差受 estimated_bound 控制.
+    """
+    h = grid['resolution']
+    values = grid['values'].astype(np.float64)
+    nodes_x, nodes_y = np.meshgrid(np.arange(grid['nx']) * h, np.arange(grid['ny']) * h)
+    away = _post_distance(nodes_x, nodes_y) > post_radius
+    second_x = np.abs(values[:, 2:] - 2 * values[:, 1:-1] + values[:, :-2])[away[:, 1:-1]]
+    second_y = np.abs(values[2:, :] - 2 * values[1:-1, :] + values[:-2, :])[away[1:-1, :]]
+    estimated_bound = (second_x.max() + second_y.max()) / 8
+    
+    cx, cy = np.meshgrid(np.arange(grid['nx'] - 1) * h + h / 2, np.arange(grid['ny'] - 1) * h + h / 2)
+    center_error = np.abs(lookup_xg(grid, cx.ravel(), cy.ravel()) - score_locations(artifact, cx.ravel(), cy.ravel()))
+    
+    rng = np.random.default_rng(seed)
+    rx = rng.uniform(0, PITCH_LENGTH, n_samples)
+    ry = rng.uniform(0, PITCH_WIDTH, n_samples)
+    random_error = np.abs(lookup_xg(grid, rx, ry) - score_locations(artifact, rx, ry))
+    near_post = _post_distance(rx, ry) <= post_radius
+    
+    return {
+        'estimated_bound': float(estimated_bound),
+        'max_error_cell_centers': float(np.nanmax(center_error)),
+        'max_error_random': float(np.nanmax(random_error)),
+        'mean_error_random': float(np.nanmean(random_error)),
+        'max_error_away_from_posts': float(np.nanmax(random_error[~near_post]))
+    }
+
+def save_xg_grid(grid, path, error=None):
+    """
+    保存网格: JSON头部 + 同名 .bin 原始float32数据 (小端, 行优先 [y][x]), 前端可直接读取
+    """
+    path = Path(path)
+    bin_path = path.with_suffix('.bin')
+    grid['values'].astype('<f4').tofile(bin_path)
+    header = {key: grid[key] for key in ('resolution', 'nx', 'ny', 'model_version')}
+    header.update({'dtype': 'float32', 'layout': 'row-major [y][x]', 'file': bin_path.name})
+    if error is not None:
+        header['error'] = error
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=1)
+
+def load_xg_grid(path):
+    """
+    读取 save_xg_grid 保存的网格
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        grid = json.load(f)
+    values = np.fromfile(path.parent / grid['file'], dtype='<f4')
+    grid['values'] = values.reshape(grid['ny'], grid['nx'])
+    return grid
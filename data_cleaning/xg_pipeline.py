@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from shot_cache import file_digest
+
+MODULE_DIR = Path(__file__).resolve().parent
+DEFAULT_EVENTS_DIR = MODULE_DIR.parent / 'open-data' / 'data' / 'events'
+WORK_DIR = 'pipeline_work'
+STATE_FILE = 'pipeline_state.json'
+STATE_VERSION = 1
+
+def pipeline_paths(events_dir=DEFAULT_EVENTS_DIR, work_dir=WORK_DIR, output_dir='.', matches_dir=None):
+    """
+    流水线中每个数据产物的路径: 中间产物放在 work_dir, 最终产物放在 output_dir
+
+    matches_dir 默认为事件目录旁边的 matches 目录 (open-data/data/matches).
+    """
+    work_dir, output_dir = Path(work_dir), Path(output_dir)
+    return {
+        'events': Path(events_dir),
+        'matches': Path(matches_dir) if matches_dir else Path(events_dir).parent / 'matches',
+        'shot_cache': work_dir / 'shot_cache',
+        'shots': work_dir / 'shots.parquet',
+        'minutes': work_dir / 'minutes.parquet',
+        'model': output_dir / 'xg_model.json',
+        'scored_shots': work_dir / 'scored_shots.parquet',
+        'formula': output_dir / 'xg_formula.txt',
+        'grid': output_dir / 'xg_grid.json',
+        'evaluation': output_dir / 'xg_evaluation.json',
+        'calibration_figure': output_dir / 'xg_calibration.png',
+        'figure_2d': output_dir / 'shot_analysis_2d.png',
+        'figure_3d': output_dir / 'shot_analysis_3d.png',
+        'shot_map': output_dir / 'shot_map.png',
+        'export': output_dir / 'shot_data.json',
+        'tiles': output_dir / 'shot_tiles',
+        'rollups': output_dir / 'shot_rollups'
+    }
+
+def _read_shots(path):
+    import pandas as pd
+    return pd.read_parquet(path)
+
+def run_shots(paths, options):
+    from data_funtion import add_match_partitions, process_files
+    shots_df, minutes_df = process_files(paths['events'], workers=options.get('workers', 1),
+                                         cache_dir=paths['shot_cache'], with_minutes=True)
+    shots_df = add_match_partitions(shots_df, paths['matches'])
+    minutes_df = add_match_partitions(minutes_df, paths['matches'])
+    if len(shots_df) == 0:
+        raise ValueError("No shot data found")
+    print(f"\nTotal shots: {len(shots_df)}")
+    print(f"Goals: {shots_df['is_goal'].sum()}")
+    print(f"Conversion rate: {shots_df['is_goal'].mean():.3f}")
+    shots_df.to_parquet(paths['shots'], index=False)
+    minutes_df.to_parquet(paths['minutes'], index=False)
+
+def run_train(paths, options):
+    from xg_training import XG_FEATURES, train_xg_model
+    from xg_scorer import save_model_artifact
+    model, scaler, _ = train_xg_model(_read_shots(paths['shots']))
+    save_model_artifact(model, scaler, paths['model'], XG_FEATURES)
+
+def run_score(paths, options):
+    from xg_scorer import load_model_artifact, score_shots
+    shots_df = _read_shots(paths['shots'])
+    shots_df['predicted_xg'] = score_shots(load_model_artifact(paths['model']), shots_df)
+    shots_df.to_parquet(paths['scored_shots'], index=False)
+
+def run_formula(paths, options):
+    from xg_training import format_xg_formula
+    with open(paths['model'], 'r', encoding='utf-8') as f:
+        artifact = json.load(f)
+    if artifact['model_type'] != 'logistic':
+        raise ValueError("Only logistic models have a closed-form xG formula")
+    formula = format_xg_formula(artifact['features'], artifact['means'], artifact['scales'],
+                                artifact['coefficients'], artifact['intercept'])
+    with open(paths['formula'], 'w') as f:
+        f.write(formula)
+
+def run_grid(paths, options):
+    from xg_grid import build_xg_grid, grid_error_bound, save_xg_grid
+    from xg_scorer import load_model_artifact
+    artifact = load_model_artifact(paths['model'])
+    grid = build_xg_grid(artifact)
+    save_xg_grid(grid, paths['grid'], error=grid_error_bound(grid, artifact))
+
+def run_evaluate(paths, options):
+    from xg_evaluation import evaluate_xg, write_evaluation_report
+    write_evaluation_report(evaluate_xg(_read_shots(paths['scored_shots'])), paths['evaluation'],
+                            paths['calibration_figure'])
+
+def run_plots(paths, options):
+    from shot_plots import render_all_figures
+    output_prefix = str(paths['figure_2d'])[:-len('_2d.png')]
+    render_all_figures(_read_shots(paths['scored_shots']), output_prefix=output_prefix,
+                       shot_map_file=paths['shot_map'], figures=('2d', '3d', 'shot_map'),
+                       workers=options.get('plot_workers'))
+
+def run_export(paths, options):
+    from shot_export import export_shot_data
+    export_shot_data(_read_shots(paths['scored_shots']), paths['export'])
+
+def run_tiles(paths, options):
+    from shot_tiles import build_tiles, save_tiles
+    save_tiles(build_tiles(_read_shots(paths['scored_shots'])), paths['tiles'])
+
+def run_rollups(paths, options):
+    from shot_rollups import build_rollups, rollup_table, save_rollups
+    rollups = build_rollups(_read_shots(paths['scored_shots']), _read_shots(paths['minutes']))
+    save_rollups(rollups, paths['rollups'])
+    print("\nTop players by xG:")
+    print(rollup_table(rollups, 'player').head(10).to_string(index=False))
+
+# Stage -> data products it reads and writes, the modules whose source it depends on, and its entry point.
+# Dependencies between stages follow from inputs and outputs; the shot cache is a private
+# working directory of the shots stage, not an output other stages may depend on; its entries are keyed
+# by a digest of the extractor modules, so a code change that reruns the stage also re-extracts every match.
+STAGES = {
+    'shots': {
+        'inputs': ['events', 'matches'], 'outputs': ['shots', 'minutes'], 'code': ['data_funtion', 'shot_geometry', 'shot_cache', 'shot_store'],
+        'run': run_shots
+    },
+    'train': {'inputs': ['shots'], 'outputs': ['model'], 'code': ['xg_training', 'xg_scorer'], 'run': run_train},
+    'score': {'inputs': ['shots', 'model'], 'outputs': ['scored_shots'], 'code': ['xg_scorer', 'shot_geometry'], 'run': run_score},
+    'formula': {'inputs': ['model'], 'outputs': ['formula'], 'code': ['xg_training'], 'run': run_formula},
+    'grid': {'inputs': ['model'], 'outputs': ['grid'], 'code': ['xg_grid', 'xg_scorer'], 'run': run_grid},
+    'evaluate': {
+        'inputs': ['scored_shots'], 'outputs': ['evaluation', 'calibration_figure'], 'code': ['xg_evaluation'],
+        'run': run_evaluate
+    },
+    'plots': {
+        'inputs': ['scored_shots'], 'outputs': ['figure_2d', 'figure_3d', 'shot_map'], 'code': ['shot_plots'],
+        'run': run_plots
+    },
+    'export': {'inputs': ['scored_shots'], 'outputs': ['export'], 'code': ['shot_export'], 'run': run_export},
+    'tiles': {'inputs': ['scored_shots'], 'outputs': ['tiles'], 'code': ['shot_tiles'], 'run': run_tiles},
+    'rollups': {'inputs': ['scored_shots', 'minutes'], 'outputs': ['rollups'], 'code': ['shot_rollups'], 'run': run_rollups}
+}
+
+def stage_dependencies(stages=STAGES):
+    """
+    由输入/输出推导每个阶段依赖的上游阶段
+    """
+    producers = {output: name for name, stage in stages.items() for output in stage['outputs']}
+    return {
+        name: sorted({producers[item] for item in stage['inputs'] if item in producers} - {name})
+        for name, stage in stages.items()
+    }
+
+def _required_stages(targets, dependencies):
+    required, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in required:
+            required.add(name)
+            pending.extend(dependencies[name])
+    return required
+
+def _cached_digest(path, digests):
+    """
+    文件内容的SHA-1; mtime和大小与上次相同时直接沿用记录的摘要 (同 shot_cache 的判断方式)
+    """
+    stat = os.stat(path)
+    key = str(path)
+    entry = digests.get(key)
+    if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': file_digest(path)}
+        digests[key] = entry
+    return entry['sha1']
+
+def path_digest(path, digests):
+    """
+    数据产物的内容摘要: 文件取内容哈希, 目录取所有文件 (相对路径和内容哈希) 的组合哈希
+    """
+    path = Path(path)
+    if path.is_file():
+        return _cached_digest(path, digests)
+    if not path.is_dir():
+        return None
+    digest = hashlib.sha1()
+    for file in sorted(p for p in path.rglob('*') if p.is_file()):
+        digest.update(f"{file.relative_to(path).as_posix()}\0{_cached_digest(file, digests)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def stage_fingerprint(name, paths, digests, stages=STAGES):
+    """
+    阶段的指纹: 输入内容, 代码文件内容和输出路径的组合哈希; 任何一项变化都需要重新运行
+    """
+    stage = stages[name]
+    digest = hashlib.sha1(f"{STATE_VERSION}:{name}".encode('utf-8'))
+    for item in stage['inputs']:
+        digest.update(f"input {item} {path_digest(paths[item], digests)}\n".encode('utf-8'))
+    for module in stage['code']:
+        digest.update(f"code {module} {path_digest(MODULE_DIR / f'{module}.py', digests)}\n".encode('utf-8'))
+    for item in stage['outputs']:
+        digest.update(f"output {item} {Path(paths[item]).resolve()}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _read_state(state_path):
+    if not state_path.exists():
+        return {'stages': {}, 'digests': {}}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        return {'stages': {}, 'digests': {}}
+    return state
+
+def _write_state(state_path, state):
+    tmp_path = state_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, **state}, f, indent=1)
+    os.replace(tmp_path, state_path)
+
+def _run_stage(name, paths, options):
+    STAGES[name]['run'](paths, options)
+    return name
+
+def run_pipeline(targets=None, paths=None, force=(), jobs=None, dry_run=False, options=None):
+    """
+    按依赖顺序运行流水线阶段, 互不依赖的阶段在进程池中并发运行
+    
+    targets 为要生成的阶段 (默认全部), 其上游阶段会一并检查. 指纹 (输入内容, 代码, 输出路径)
+    与上次成功运行相同且输出都存在的阶段会被跳过; force 中的阶段总是重新运行.
+    返回 阶段 -> 'ran' / 'skipped' / 'would run' 的字典.
+    """
+    paths = paths or pipeline_paths()
+    options = options or {}
+    dependencies = stage_dependencies()
+    targets = list(targets or STAGES)
+    unknown = set(targets) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    required = _required_stages(targets, dependencies)
+    
+    state_path = Path(paths['shots']).parent / STATE_FILE
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    for item in ('model', 'formula', 'evaluation', 'export'):
+        Path(paths[item]).parent.mkdir(parents=True, exist_ok=True)
+    state = _read_state(state_path)
+    jobs = jobs or min(len(required), os.cpu_count() or 1)
+    
+    status, running = {}, {}
+    
+    def schedule(executor):
+        # a stage is ready once all of its upstream stages have finished or been skipped
+        for name in STAGES:
+            if name not in required or name in status or name in running.values():
+                continue
+            if not all(upstream in status for upstream in dependencies[name]):
+                continue
+            if any(status[upstream] == 'would run' for upstream in dependencies[name]):
+                status[name] = 'would run'
+                continue
+            fingerprint = stage_fingerprint(name, paths, state['digests'])
+            outputs_exist = all(Path(paths[item]).exists() for item in STAGES[name]['outputs'])
+            if name not in force and outputs_exist and state['stages'].get(name) == fingerprint:
+                status[name] = 'skipped'
+                print(f"[{name}] up to date, skipped")
+            elif dry_run:
+                status[name] = 'would run'
+            else:
+                print(f"[{name}] running")
+                running[executor.submit(_run_stage, name, paths, options)] = name
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        schedule(executor)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    future.result()
+                except Exception:
+                    # stages that already finished keep their recorded fingerprints
+                    for other in running:
+                        other.cancel()
+                    _write_state(state_path, state)
+                    print(f"[{name}] failed")
+                    raise
+                state['stages'][name] = stage_fingerprint(name, paths, state['digests'])
+                status[name] = 'ran'
+                _write_state(state_path, state)
+            # rerun outputs are rehashed when downstream fingerprints are taken
+            schedule(executor)
+    
+    _write_state(state_path, state)
+    return {name: status[name] for name in STAGES if name in status}
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the xG pipeline, skipping stages whose inputs and code are unchanged')
+    parser.add_argument('stages', nargs='*', help=f"stages to bring up to date (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--events-dir', default=DEFAULT_EVENTS_DIR, help='StatsBomb events folder')
+    parser.add_argument('--matches-dir', default=None, help='StatsBomb matches folder (default: next to events)')
+    parser.add_argument('--work-dir', default=WORK_DIR, help='intermediate data and pipeline state')
+    parser.add_argument('--output-dir', default='.', help='model, formula, figures and exports')
+    parser.add_argument('--force', nargs='*', default=(), help='stages to rerun even if up to date (no names: all)')
+    parser.add_argument('--jobs', type=int, default=None, help='stages run concurrently')
+    parser.add_argument('--workers', type=int, default=1, help='processes for event extraction')
+    parser.add_argument('--plot-workers', type=int, default=None, help='processes for figure rendering')
+    parser.add_argument('--dry-run', action='store_true', help='only report which stages would run')
+    parser.add_argument('--list', action='store_true', help='list stages and their dependencies')
+    args = parser.parse_args(argv)
+    
+    if args.list:
+        for name, upstream in stage_dependencies().items():
+            stage = STAGES[name]
+            print(f"{name:<9} after: {', '.join(upstream) or '-':<14} "
+                  f"in: {', '.join(stage['inputs']):<20} out: {', '.join(stage['outputs'])}")
+        return None
+    
+    force = STAGES if args.force == [] else args.force
+    status = run_pipeline(
+        args.stages, pipeline_paths(args.events_dir, args.work_dir, args.output_dir, args.matches_dir), force=force, jobs=args.jobs,
+        dry_run=args.dry_run, options={'workers': args.workers, 'plot_workers': args.plot_workers}
+    )
+    print("\n" + "\n".join(f"{name:<9} {result}" for name, result in status.items()))
+    return status
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Dependency-light xG scoring: NumPy only, no sklearn / matplotlib / seaborn
+import json
+import numpy as np
+from shot_geometry import calculate_shot_metrics_batch
+
+ARTIFACT_FORMAT = 'xg-model'
+ARTIFACT_FORMAT_VERSION = 1
+# Fields of sklearn's private tree node records that the tree export reads
+TREE_NODE_FIELDS = ('feature_idx', 'num_threshold', 'missing_go_to_left', 'left', 'right', 'is_leaf', 'value', 'is_categorical')
+
+def _tree_fields(model):
+    """
+    导出梯度提升模型的树结构; 叶子值已包含学习率
+
+    读取的是 HistGradientBoostingClassifier 的私有属性 (_predictors, _baseline_prediction,
+    节点记录的字段), 结构与预期不符时报错, 而不是导出错误的模型.
+    """
+    from sklearn import __version__ as sklearn_version
+    
+    predictors = getattr(model, '_predictors', None)
+    baseline = getattr(model, '_baseline_prediction', None)
+    if predictors is None or baseline is None or np.size(baseline) != 1:
+        raise ValueError(
+            f"Unsupported gradient boosting model layout (scikit-learn {sklearn_version}): "
+            "expected a fitted binary HistGradientBoostingClassifier"
+        )
+    trees = []
+    for tree in predictors:
+        nodes = getattr(tree[0], 'nodes', None) if isinstance(tree, (list, tuple)) and len(tree) == 1 else None
+        missing = set(TREE_NODE_FIELDS) - set(getattr(getattr(nodes, 'dtype', None), 'names', None) or ())
+        if missing:
+            raise ValueError(
+                f"Unsupported tree node layout (scikit-learn {sklearn_version}): missing {', '.join(sorted(missing))}"
+            )
+        if nodes['is_categorical'].any():
+            raise ValueError("Categorical splits are not supported in model artifacts")
+        trees.append({
+            'feature': nodes['feature_idx'].tolist(),
+            'threshold': nodes['num_threshold'].tolist(),
+            'missing_left': nodes['missing_go_to_left'].tolist(),
+            'left': nodes['left'].tolist(),
+            'right': nodes['right'].tolist(),
+            'leaf': nodes['is_leaf'].tolist(),
+            'value': nodes['value'].tolist()
+        })
+    return {
+        'sklearn_version': sklearn_version,
+        'baseline': float(np.ravel(baseline)[0]),
+        'trees': trees
+    }
+
+def save_model_artifact(model, scaler, path, features, info=None):
+    """
+    保存紧凑的JSON模型文件: 特征列表, 标准化均值/尺度, 系数和截距
+
+    梯度提升模型 (xg_training.train_xg_model_gbm, scaler 传 None) 保存为基线值和树结构.
+    info 可传入 build_model_state / update_xg_model 返回的状态, 用于记录模型版本.
+    """
+    info = info or {}
+    model_type = 'logistic' if hasattr(model, 'coef_') else 'gradient_boosting'
+    artifact = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_type': model_type,
+        'model_version': info.get('version', 1),
+        'parent_version': info.get('parent_version'),
+        'trained_at': info.get('trained_at'),
+        'n_samples_seen': int(info.get('n_samples_seen', getattr(scaler, 'n_samples_seen_', 0))),
+        'features': list(features)
+    }
+    if model_type == 'logistic':
+        artifact.update({
+            'means': [float(v) for v in scaler.mean_],
+            'scales': [float(v) for v in scaler.scale_],
+            'coefficients': [float(v) for v in np.ravel(model.coef_)],
+            'intercept': float(np.ravel(model.intercept_)[0])
+        })
+    else:
+        artifact.update(_tree_fields(model))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, indent=1)
+    return artifact
+
+def load_model_artifact(path):
+    """
+    读取模型文件, 并把标准化折叠进系数以便一次矩阵乘法完成打分
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        artifact = json.load(f)
+    if artifact.get('format') != ARTIFACT_FORMAT or artifact.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact: {path}")
+    return prepare_artifact(artifact)
+
+def prepare_artifact(artifact):
+    """
+    预计算原始特征空间中的系数: logit = X @ weights + bias
+
+    梯度提升模型则把所有树拼接成平坦的节点数组.
+    """
+    if artifact['model_type'] == 'gradient_boosting':
+        return _prepare_trees(artifact)
+    means = np.asarray(artifact['means'], dtype=np.float64)
+    scales = np.asarray(artifact['scales'], dtype=np.float64)
+    coefficients = np.asarray(artifact['coefficients'], dtype=np.float64)
+    artifact['weights'] = coefficients / scales
+    artifact['bias'] = float(artifact['intercept'] - np.sum(coefficients * means / scales))
+    return artifact
+
+def _prepare_trees(artifact):
+    trees = artifact['trees']
+    offsets = np.cumsum([0] + [len(tree['value']) for tree in trees])
+    def column(name, dtype):
+        return np.concatenate([np.asarray(tree[name], dtype=dtype) for tree in trees])
+    
+    # child indices are local to each tree; shift them into the concatenated node arrays
+    shift = np.repeat(offsets[:-1], np.diff(offsets))
+    artifact['node_feature'] = column('feature', np.int64)
+    artifact['node_threshold'] = column('threshold', np.float64)
+    artifact['node_missing_left'] = column('missing_left', bool)
+    artifact['node_left'] = column('left', np.int64) + shift
+    artifact['node_right'] = column('right', np.int64) + shift
+    artifact['node_value'] = column('value', np.float64)
+    artifact['node_leaf'] = column('leaf', bool)
+    artifact['roots'] = offsets[:-1]
+    return artifact
+
+def _sigmoid(z):
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+def _tree_logits(artifact, X):
+    """
+    逐棵树向量化遍历: 所有射门同时向下走一层, 已到达叶子的射门退出活动集合
+    """
+    columns = np.ascontiguousarray(X.T)
+    feature, threshold, missing_left = artifact['node_feature'], artifact['node_threshold'], artifact['node_missing_left']
+    left, right, is_leaf = artifact['node_left'], artifact['node_right'], artifact['node_leaf']
+    logits = np.full(len(X), artifact['baseline'])
+    for root in artifact['roots']:
+        node = np.full(len(X), root)
+        active = np.arange(len(X))
+        while len(active):
+            current = node[active]
+            value = columns[feature[current], active]
+            go_left = (value <= threshold[current]) | (np.isnan(value) & missing_left[current])
+            current = np.where(go_left, left[current], right[current])
+            node[active] = current
+            active = active[~is_leaf[current]]
+        logits += artifact['node_value'][node]
+    return logits
+
+def score_features(artifact, X):
+    """
+    对按 artifact['features'] 顺序排列的特征矩阵打分, 返回xG数组
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if artifact['model_type'] == 'gradient_boosting':
+        # trees were grown on float32 features; round the same way so split decisions match
+        X = X.reshape(-1, len(artifact['features'])).astype(np.float32).astype(np.float64)
+        return _sigmoid(_tree_logits(artifact, X))
+    return _sigmoid(X @ artifact['weights'] + artifact['bias'])
+
+def feature_matrix(artifact, shots):
+    """
+    从DataFrame或列数组字典中取出模型特征; 缺少距离和角度时由x, y计算
+    """
+    columns = {}
+    if 'distance_to_goal' in artifact['features'] or 'shot_angle' in artifact['features']:
+        if 'distance_to_goal' not in shots or 'shot_angle' not in shots:
+            columns['distance_to_goal'], columns['shot_angle'] = calculate_shot_metrics_batch(shots['x'], shots['y'])
+    return np.column_stack([
+        np.asarray(columns[name] if name in columns else shots[name], dtype=np.float64)
+        for name in artifact['features']
+    ])
+
+def score_shots(artifact, shots):
+    """
+    对一批射门打分; shots 为DataFrame或列数组字典
+    """
+    return score_features(artifact, feature_matrix(artifact, shots))
+
+def score_locations(artifact, x, y):
+    """
+    对射门位置打分 (仅适用于只使用位置特征的模型)
+    """
+    return score_shots(artifact, {'x': np.asarray(x, dtype=np.float64), 'y': np.asarray(y, dtype=np.float64)})
+
+if __name__ == "__main__":
+    import sys
+    artifact = load_model_artifact(sys.argv[1] if len(sys.argv) > 1 else 'xg_model.json')
+    print(f"Loaded xG model v{artifact['model_version']} ({', '.join(artifact['features'])})")
@@ -0,0 +1,153 @@
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+from xg_evaluation import score_metrics
+from xg_training import XG_FEATURES
+
+SELECTION_FEATURE_SETS = {
+    'location': XG_FEATURES,
+    'context': XG_FEATURES + ['under_pressure', 'first_time', 'defenders_in_cone', 'keeper_distance']
+}
+SELECTION_C_VALUES = (0.01, 0.1, 1.0, 10.0)
+SELECTION_FAMILIES = ('logistic', 'gradient_boosting')
+
+def model_configs(C_values=SELECTION_C_VALUES, feature_sets=SELECTION_FEATURE_SETS, families=SELECTION_FAMILIES):
+    """
+    生成待评估的配置: 逻辑回归对每个正则化强度C各一个, 梯度提升每个特征集一个
+    """
+    configs = []
+    for family, feature_set in itertools.product(families, feature_sets):
+        if family == 'logistic':
+            configs.extend({'family': family, 'feature_set': feature_set, 'C': C} for C in C_values)
+        elif family == 'gradient_boosting':
+            configs.append({'family': family, 'feature_set': feature_set, 'C': None})
+        else:
+            raise ValueError(f"Unknown model family: {family}")
+    return configs
+
+def match_folds(match_ids, n_splits=5, seed=42):
+    """
+    按比赛分组分配fold, 同一场比赛的射门只出现在同一个fold里
+    """
+    matches, codes = np.unique(np.asarray(match_ids), return_inverse=True)
+    if len(matches) < n_splits:
+        raise ValueError(f"Need at least {n_splits} matches for {n_splits}-fold CV, got {len(matches)}")
+    # shuffle the matches, then deal them out so every fold gets a similar number of shots
+    order = np.random.default_rng(seed).permutation(len(matches))
+    sizes = np.bincount(codes, minlength=len(matches))
+    match_fold = np.empty(len(matches), dtype=np.int8)
+    fold_sizes = np.zeros(n_splits, dtype=np.int64)
+    for match in order[np.argsort(-sizes[order], kind='stable')]:
+        fold = np.argmin(fold_sizes)
+        match_fold[match] = fold
+        fold_sizes[fold] += sizes[match]
+    return match_fold[codes]
+
+def _make_estimator(config):
+    if config['family'] == 'logistic':
+        return make_pipeline(StandardScaler(), LogisticRegression(C=config['C'], random_state=42))
+    return HistGradientBoostingClassifier(random_state=42)
+
+def _init_fold_worker(n_threads):
+    # Each worker fits one model at a time; cap its OpenMP/BLAS threads so workers x threads stays at the core count
+    threadpool_limits(n_threads)
+
+def _run_fold(folder, columns, config, fold):
+    """
+    在一个进程中评估一个配置的一个fold; 特征矩阵以只读内存映射方式打开, 不在进程间复制
+    """
+    start = time.perf_counter()
+    folder = Path(folder)
+    matrix = np.load(folder / 'features.npy', mmap_mode='r')
+    y = np.load(folder / 'is_goal.npy', mmap_mode='r')
+    folds = np.load(folder / 'folds.npy', mmap_mode='r')
+    
+    test = folds == fold
+    X = matrix[:, columns]
+    X_train, X_test = X[~test], X[test]
+    if config['family'] == 'logistic':
+        # logistic regression needs complete rows: impute missing values with the training mean
+        fill = np.nanmean(X_train, axis=0)
+        X_train = np.where(np.isnan(X_train), fill, X_train)
+        X_test = np.where(np.isnan(X_test), fill, X_test)
+    
+    estimator = _make_estimator(config)
+    estimator.fit(X_train, y[~test])
+    y_prob = estimator.predict_proba(X_test)[:, 1]
+    
+    return {
+        **config,
+        'fold': fold,
+        'n_train': int((~test).sum()),
+        'n_test': int(test.sum()),
+        **score_metrics(np.asarray(y[test], dtype=np.float64), y_prob),
+        'wall_time': time.perf_counter() - start
+    }
+
+def cross_validate_xg(shots_df, configs=None, feature_sets=SELECTION_FEATURE_SETS, n_splits=5, workers=None, seed=42):
+    """
+    按比赛分组的k折交叉验证, 在进程池中并行评估所有 (配置, fold) 组合
+    
+    所有特征列只写一次到临时 .npy 文件, 各进程用内存映射读取. 每个进程的OpenMP/BLAS线程数
+    限制为 CPU核心数 // workers, 避免梯度提升在每个进程中再占满所有核心. 返回 (每个fold的结果, 按配置汇总的结果),
+    汇总表按平均log loss排序.
+    """
+    configs = model_configs(feature_sets=feature_sets) if configs is None else configs
+    feature_names = list(dict.fromkeys(name for config in configs for name in feature_sets[config['feature_set']]))
+    workers = workers or os.cpu_count() or 1
+    
+    with tempfile.TemporaryDirectory(prefix='xg_cv_') as folder:
+        np.save(Path(folder) / 'features.npy', shots_df[feature_names].to_numpy(dtype=np.float64))
+        np.save(Path(folder) / 'is_goal.npy', shots_df['is_goal'].to_numpy(dtype=np.float64))
+        np.save(Path(folder) / 'folds.npy', match_folds(shots_df['match_id'], n_splits, seed))
+    
+        tasks = [
+            (config, [feature_names.index(name) for name in feature_sets[config['feature_set']]], fold)
+            for config in configs for fold in range(n_splits)
+        ]
+        if workers == 1:
+            results = [_run_fold(folder, columns, config, fold) for config, columns, fold in tasks]
+        else:
+            n_threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_fold_worker, initargs=(n_threads,)) as executor:
+                futures = [executor.submit(_run_fold, folder, columns, config, fold) for config, columns, fold in tasks]
+                results = [future.result() for future in futures]
+    
+    fold_results = pd.DataFrame(results)
+    summary = (
+        fold_results
+        .groupby(['family', 'feature_set', 'C'], dropna=False, sort=False)
+        .agg(
+            log_loss=('log_loss', 'mean'),
+            log_loss_std=('log_loss', 'std'),
+            brier=('brier', 'mean'),
+            calibration_error=('calibration_error', 'mean'),
+            xg_ratio=('xg_ratio', 'mean'),
+            wall_time=('wall_time', 'mean')
+        )
+        .sort_values('log_loss')
+        .reset_index()
+    )
+    return fold_results, summary
+
+def select_xg_model(shots_df, **kwargs):
+    """
+    交叉验证并打印结果, 返回平均log loss最低的配置
+    """
+    fold_results, summary = cross_validate_xg(shots_df, **kwargs)
+    print("\nCross-validation results (mean over folds):")
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    best = summary.iloc[0]
+    print(f"\nBest configuration: {best['family']} on '{best['feature_set']}' features"
+          + (f", C={best['C']}" if pd.notna(best['C']) else ""))
+    return {'family': best['family'], 'feature_set': best['feature_set'], 'C': None if pd.isna(best['C']) else float(best['C'])}
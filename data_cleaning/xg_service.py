@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+import numpy as np
+from data_funtion import iter_events, process_shot_data
+from xg_scorer import feature_matrix, load_model_artifact, score_features
+
+LATENCY_WINDOW = 100000
+
+class ScoringError(RuntimeError):
+    """
+    批量打分失败 (如模型特征与射门字段不匹配), 由服务返回 500
+    """
+
+class MicroBatcher:
+    """
+    把并发到达的射门合并成小批量, 一次向量化打分
+
+    队列里有数据时最多等待 max_wait_ms 或凑满 max_batch 个射门就打分.
+    """
+    def __init__(self, artifact, max_batch=256, max_wait_ms=1.0):
+        self.artifact = artifact
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.model_seconds = 0.0
+        self.shots = 0
+        self.batches = 0
+        self.requests = 0
+    
+    async def score(self, shots):
+        """
+        对一个请求中的射门 (process_shot_data 的结果) 打分
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((shots, future))
+        return await future
+    
+    async def run(self):
+        while True:
+            items = [await self.queue.get()]
+            size = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                size += len(item[0])
+            try:
+                self._score_batch(items)
+            except Exception as e:
+                # fail this batch's requests but keep the batcher alive for the next ones
+                error = ScoringError(f"scoring failed: {e!r}")
+                error.__cause__ = e
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(error)
+    
+    def _score_batch(self, items):
+        shots = [shot for request_shots, _ in items for shot in request_shots]
+        start = time.perf_counter()
+        if shots:
+            columns = {name: np.array([shot[name] for shot in shots], dtype=np.float64) for name in self.artifact['features']}
+            xg = score_features(self.artifact, feature_matrix(self.artifact, columns)).tolist()
+        else:
+            xg = []
+        self.model_seconds += time.perf_counter() - start
+        self.shots += len(shots)
+        self.batches += 1
+        
+        offset = 0
+        for request_shots, future in items:
+            if not future.done():
+                future.set_result(xg[offset:offset + len(request_shots)])
+            offset += len(request_shots)
+    
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'requests': self.requests,
+            'shots': self.shots,
+            'batches': self.batches,
+            'mean_batch_size': self.shots / self.batches if self.batches else 0.0,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p99': float(np.percentile(latencies, 99))
+            },
+            'model_ms_per_shot': self.model_seconds * 1000 / self.shots if self.shots else 0.0
+        }
+
+async def _handle_score(batcher, body):
+    start = time.perf_counter()
+    payload = json.loads(body or b'[]')
+    events = payload if isinstance(payload, list) else [payload]
+    
+    shots, positions = [], []
+    for i, event in enumerate(events):
+        shot = process_shot_data(event) if isinstance(event, dict) else None
+        if shot:
+            shots.append(shot)
+            positions.append(i)
+    
+    xg = [None] * len(events)
+    for position, value in zip(positions, await batcher.score(shots)):
+        xg[position] = value
+    
+    batcher.requests += 1
+    batcher.latencies.append(time.perf_counter() - start)
+    return {'xg': xg}
+
+def _write_response(writer, status, response):
+    data = json.dumps(response).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+    )
+
+async def _handle_connection(batcher, reader, writer):
+    """
+    极简HTTP/1.1: POST /score 打分, GET /stats 返回延迟统计, 支持keep-alive
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            try:
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                content_length = int(headers.get('content-length', 0))
+                if content_length < 0:
+                    raise ValueError(f"negative content length {content_length}")
+            except ValueError:
+                # without a valid request line or length the stream can't be framed; answer and close
+                _write_response(writer, '400 Bad Request', {'error': 'malformed request'})
+                await writer.drain()
+                break
+            body = await reader.readexactly(content_length)
+            
+            try:
+                if method == 'POST' and path == '/score':
+                    status, response = '200 OK', await _handle_score(batcher, body)
+                elif method == 'GET' and path == '/stats':
+                    status, response = '200 OK', batcher.stats()
+                else:
+                    status, response = '404 Not Found', {'error': f"unknown endpoint {method} {path}"}
+            except ScoringError as e:
+                status, response = '500 Internal Server Error', {'error': str(e)}
+            except (ValueError, KeyError) as e:
+                status, response = '400 Bad Request', {'error': str(e)}
+            
+            _write_response(writer, status, response)
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                break
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def start_service(artifact, host='127.0.0.1', port=8765, max_batch=256, max_wait_ms=1.0):
+    """
+    启动打分服务, 返回 (server, batcher); port=0 时由系统分配端口
+    """
+    batcher = MicroBatcher(artifact, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    batcher.task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_connection(batcher, reader, writer), host, port
+    )
+    return server, batcher
+
+async def _post(reader, writer, path, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    return await _read_response(reader)
+
+async def _read_response(reader):
+    headers = {}
+    await reader.readline()
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return json.loads(await reader.readexactly(int(headers['content-length'])))
+
+async def replay_feed(events, host='127.0.0.1', port=8765, connections=32, shots_per_request=1):
+    """
+    本地模拟实时数据源: 用多个keep-alive连接并发发送射门事件, 返回服务端统计
+    """
+    shots = [event for event in events if event.get('type', {}).get('name') == 'Shot']
+    requests = [shots[i:i + shots_per_request] for i in range(0, len(shots), shots_per_request)]
+    
+    async def client(chunk):
+        reader, writer = await asyncio.open_connection(host, port)
+        for request in chunk:
+            await _post(reader, writer, '/score', request)
+        writer.close()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::connections]) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    stats = await _read_response(reader)
+    writer.close()
+    stats['client_shots_per_second'] = len(shots) / elapsed if elapsed else 0.0
+    return stats
+
+async def _serve(args):
+    artifact = load_model_artifact(args.model)
+    server, batcher = await start_service(artifact, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"Scoring service on {args.host}:{server.sockets[0].getsockname()[1]} (model v{artifact['model_version']})")
+    if args.replay:
+        events = [event for file in args.replay for event in iter_events(file)]
+        stats = await replay_feed(events, args.host, server.sockets[0].getsockname()[1], args.connections)
+        print(json.dumps(stats, indent=1))
+        server.close()
+        return
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Live xG scoring service')
+    parser.add_argument('--model', default='xg_model.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=1.0)
+    parser.add_argument('--replay', nargs='*', help='replay StatsBomb event files against the service and exit')
+    parser.add_argument('--connections', type=int, default=32)
+    asyncio.run(_serve(parser.parse_args()))
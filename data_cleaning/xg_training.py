@@ -0,0 +1,278 @@
+import copy
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+XG_FEATURES = ['x', 'y', 'distance_to_goal', 'shot_angle']
+# xG can only fall with distance and only rise with the visible goal angle
+GBM_MONOTONIC = {'distance_to_goal': -1, 'shot_angle': 1}
+_FORMULA_NAMES = {'distance_to_goal': 'distance_std', 'shot_angle': 'angle_std'}
+
+def format_xg_formula(features, means, scales, coefficients, intercept):
+    """
+    生成可读的xG公式
+    """
+    std_names = [_FORMULA_NAMES.get(name, f"{name}_std") for name in features]
+    standardize = "\n".join(
+        f"        {std} = ({name} - {mean:.3f}) / {scale:.3f}"
+        for name, std, mean, scale in zip(features, std_names, means, scales)
+    )
+    log_odds = " + \n".join(
+        f"                   {coef:.3f} * {std}" for std, coef in zip(std_names, coefficients)
+    )
+    feature_coefficients = "\n".join(f"    {name}: {coef:.3f}" for name, coef in zip(features, coefficients))
+    
+    return f"""
+    xG Formula:
+    
+    1. Standardize variables:
+{standardize}
+    
+    2. Calculate log odds:
+        log_odds = {intercept:.3f} + 
+{log_odds}
+    
+    3. Convert to probability:
+        xG = 1 / (1 + exp(-log_odds))
+    
+    Feature coefficients:
+{feature_coefficients}
+    """
+
+def train_xg_model(shots_df, features=XG_FEATURES):
+    """
+    训练xG模型并生成公式
+    """
+    X = shots_df[features]
+    y = shots_df['is_goal']
+    
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    
+    model = LogisticRegression(random_state=42)
+    model.fit(X_scaled, y)
+    
+    formula = format_xg_formula(features, scaler.mean_, scaler.scale_, model.coef_[0], model.intercept_[0])
+    
+    return model, scaler, formula
+
+def train_xg_model_gbm(shots_df, features=XG_FEATURES, max_iter=300, learning_rate=0.1, max_leaf_nodes=31,
+                       max_bins=255, early_stopping=True):
+    """
+    训练基于直方图的梯度提升xG模型, 捕捉距离和角度的非线性关系
+
+    特征以float32传入并被分箱为至多 max_bins 个区间 (uint8), 树的分裂在区间上搜索,
+    训练通过OpenMP多线程进行. 距离单调递减, 角度单调递增. 不需要标准化, 因此不返回scaler;
+    用 xg_scorer.save_model_artifact(model, None, path, features) 保存为同一种模型文件.
+    """
+    X = shots_df[features].to_numpy(dtype=np.float32)
+    y = shots_df['is_goal'].to_numpy()
+    
+    model = HistGradientBoostingClassifier(
+        learning_rate=learning_rate,
+        max_iter=max_iter,
+        max_leaf_nodes=max_leaf_nodes,
+        max_bins=max_bins,
+        monotonic_cst=[GBM_MONOTONIC.get(name, 0) for name in features],
+        early_stopping=early_stopping,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        random_state=42
+    )
+    model.fit(X, y)
+    print(f"Gradient boosting: {model.n_iter_} trees")
+    return model
+
+def _fitted_logistic_model(coef, intercept, C=1.0, n_iter=1):
+    model = LogisticRegression(C=C, random_state=42)
+    model.classes_ = np.array([0, 1])
+    model.coef_ = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+    model.intercept_ = np.array([float(intercept)])
+    model.n_features_in_ = model.coef_.shape[1]
+    model.n_iter_ = np.array([n_iter])
+    return model
+
+def _logistic_chunk_terms(X, y, coef, intercept):
+    """
+    一个数据块对逻辑回归 log loss 的贡献: 损失, 梯度和Hessian (最后一维为截距)
+    """
+    z = X @ coef + intercept
+    p = 0.5 * (1 + np.tanh(0.5 * z))
+    loss = np.sum(np.logaddexp(0, z) - y * z)
+    X1 = np.column_stack([X, np.ones(len(X))])
+    gradient = X1.T @ (p - y)
+    hessian = (X1 * (p * (1 - p))[:, None]).T @ X1
+    return loss, gradient, hessian
+
+def train_xg_model_streaming(load_chunks, features=XG_FEATURES, C=1.0, max_iter=25, tol=1e-6):
+    """
+    分块(out-of-core)训练xG模型, 内存占用只取决于块大小
+
+    load_chunks() 每次调用返回一个新的DataFrame块迭代器 (例如 shot_store.iter_shot_store),
+    每一轮会重新读取一遍. 第一遍用 StandardScaler.partial_fit 累积均值和方差,
+    之后每一遍逐块累加梯度和Hessian, 做一次牛顿迭代. 目标函数与 LogisticRegression(C=C)
+    相同, 因此系数收敛到批量训练的结果. 每轮打印平均log loss, 梯度范数和步长.
+    """
+    scaler = StandardScaler()
+    n_shots = 0
+    for chunk in load_chunks():
+        scaler.partial_fit(chunk[features].astype(np.float64))
+        n_shots += len(chunk)
+    if n_shots == 0:
+        raise ValueError("No shot data found")
+    
+    n_features = len(features)
+    coef, intercept = np.zeros(n_features), 0.0
+    # L2 penalty on the coefficients only, as in LogisticRegression
+    penalty = np.diag(np.r_[np.ones(n_features), 0.0])
+    
+    for iteration in range(max_iter):
+        loss = 0.0
+        gradient = np.zeros(n_features + 1)
+        hessian = np.zeros((n_features + 1, n_features + 1))
+        for chunk in load_chunks():
+            X = scaler.transform(chunk[features].astype(np.float64))
+            y = chunk['is_goal'].to_numpy(dtype=np.float64)
+            chunk_loss, chunk_gradient, chunk_hessian = _logistic_chunk_terms(X, y, coef, intercept)
+            loss += chunk_loss
+            gradient += chunk_gradient
+            hessian += chunk_hessian
+        
+        gradient = C * gradient + penalty @ np.r_[coef, intercept]
+        step = np.linalg.solve(C * hessian + penalty, gradient)
+        coef, intercept = coef - step[:-1], intercept - step[-1]
+        
+        print(f"Iteration {iteration + 1}: log loss {loss / n_shots:.6f}, "
+              f"gradient norm {np.linalg.norm(gradient):.3e}, step {np.max(np.abs(step)):.3e}")
+        if np.max(np.abs(step)) < tol:
+            break
+    else:
+        print(f"Warning: streaming training did not converge in {max_iter} iterations")
+    
+    model = _fitted_logistic_model(coef, intercept, C=C, n_iter=iteration + 1)
+    
+    formula = format_xg_formula(features, scaler.mean_, scaler.scale_, model.coef_[0], model.intercept_[0])
+    
+    return model, scaler, formula
+
+def build_model_state(model, scaler, shots_df, features=XG_FEATURES, C=1.0, version=1):
+    """
+    全量训练后建立可增量更新的模型状态
+
+    除模型和标准化器外, 状态还保存系数的精度矩阵 (正则化目标函数的Hessian),
+    供 update_xg_model 把历史数据的信息作为先验.
+    """
+    X = scaler.transform(shots_df[features].astype(np.float64))
+    y = shots_df['is_goal'].to_numpy(dtype=np.float64)
+    _, _, hessian = _logistic_chunk_terms(X, y, model.coef_[0], model.intercept_[0])
+    penalty = np.diag(np.r_[np.ones(len(features)), 0.0])
+    
+    return {
+        'version': version,
+        'parent_version': None,
+        'mode': 'full',
+        'trained_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'n_samples_seen': len(shots_df),
+        'features': list(features),
+        'C': C,
+        'model': model,
+        'scaler': scaler,
+        'precision': C * hessian + penalty,
+        'formula': format_xg_formula(features, scaler.mean_, scaler.scale_, model.coef_[0], model.intercept_[0])
+    }
+
+def update_xg_model(state, new_shots_df, max_iter=10, tol=1e-6):
+    """
+    用新增比赛的射门增量更新模型, 计算量只与新增数据量有关
+
+    1. 用 StandardScaler.partial_fit 合并均值和方差;
+    2. 把旧系数和精度矩阵换算到新的标准化空间;
+    3. 以旧系数为起点 (warm start), 旧精度矩阵为二次先验, 在新数据上做牛顿迭代.
+    返回版本号加一的新状态, 旧状态不变.
+    """
+    features, C = state['features'], state['C']
+    old_scaler = state['scaler']
+    X_new = new_shots_df[features].astype(np.float64)
+    y_new = new_shots_df['is_goal'].to_numpy(dtype=np.float64)
+    
+    scaler = copy.deepcopy(old_scaler)
+    scaler.partial_fit(X_new)
+    
+    # z_old = a * z_new + c, so the logit is unchanged with w' = a * w and b' = b + c . w
+    a = scaler.scale_ / old_scaler.scale_
+    c = (scaler.mean_ - old_scaler.mean_) / old_scaler.scale_
+    transform = np.eye(len(features) + 1)
+    transform[:-1, :-1] = np.diag(a)
+    transform[-1, :-1] = c
+    theta_prior = transform @ np.r_[state['model'].coef_[0], state['model'].intercept_[0]]
+    inverse = np.linalg.inv(transform)
+    precision_prior = inverse.T @ state['precision'] @ inverse
+    
+    X = scaler.transform(X_new)
+    theta = theta_prior.copy()
+    for iteration in range(max_iter):
+        _, gradient, hessian = _logistic_chunk_terms(X, y_new, theta[:-1], theta[-1])
+        gradient = C * gradient + precision_prior @ (theta - theta_prior)
+        step = np.linalg.solve(C * hessian + precision_prior, gradient)
+        theta = theta - step
+        if np.max(np.abs(step)) < tol:
+            break
+    
+    _, _, hessian = _logistic_chunk_terms(X, y_new, theta[:-1], theta[-1])
+    model = _fitted_logistic_model(theta[:-1], theta[-1], C=C, n_iter=iteration + 1)
+    
+    return {
+        'version': state['version'] + 1,
+        'parent_version': state['version'],
+        'mode': 'incremental',
+        'trained_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'n_samples_seen': state['n_samples_seen'] + len(new_shots_df),
+        'features': list(features),
+        'C': C,
+        'model': model,
+        'scaler': scaler,
+        'precision': precision_prior + C * hessian,
+        'formula': format_xg_formula(features, scaler.mean_, scaler.scale_, model.coef_[0], model.intercept_[0])
+    }
+
+def save_model_state(state, folder_path):
+    """
+    按版本号保存模型状态, 返回文件路径
+    """
+    folder_path = Path(folder_path)
+    folder_path.mkdir(parents=True, exist_ok=True)
+    path = folder_path / f"xg_model_v{state['version']}.joblib"
+    joblib.dump(state, path)
+    return path
+
+def load_model_state(path):
+    """
+    读取模型状态; path 为目录时读取其中版本号最大的状态
+    """
+    path = Path(path)
+    if path.is_dir():
+        versions = sorted(path.glob('xg_model_v*.joblib'), key=lambda p: int(p.stem.rsplit('_v', 1)[1]))
+        if not versions:
+            raise FileNotFoundError(f"No model state found in {path}")
+        path = versions[-1]
+    return joblib.load(path)
+
+def compare_model_states(state_a, state_b, shots_df):
+    """
+    比较两个模型版本(例如增量更新与全量重训)在同一批射门上的预测差异
+    """
+    predictions = []
+    for state in (state_a, state_b):
+        X = state['scaler'].transform(shots_df[state['features']].astype(np.float64))
+        predictions.append(state['model'].predict_proba(X)[:, 1])
+    diff = np.abs(predictions[0] - predictions[1])
+    return {
+        'versions': (state_a['version'], state_b['version']),
+        'max_abs_xg_diff': float(diff.max()),
+        'mean_abs_xg_diff': float(diff.mean()),
+        'total_xg_diff': float(predictions[0].sum() - predictions[1].sum())
+    }